@@ -6,37 +6,69 @@ Built by: Nerdware Technologies
 Architecture: God-Level Production-Ready System
 """
 
-from flask import Flask
+from flask import Flask, render_template, request, g
 from flask_cors import CORS
 from flask_migrate import Migrate
+from flask_login import LoginManager, current_user
+from sqlalchemy import inspect, select, text
+from sqlalchemy.orm import joinedload
+import click
 import os
+import re
+import time
+import atexit
+import gzip
+import queue
+import threading
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from datetime import datetime
+from pathlib import Path
+
+# Resolved once at import so forked workers share them copy-on-write
+from config import config
+from models import (
+    db, Organization, User, Role, Permission,
+    DataSource, Widget, Dashboard, DashboardWidget,
+    AuditLog, Notification, APIKey, DataRefreshLog
+)
+from models.permission import create_default_permissions, create_default_roles
+from services import (
+    AuthService, DataFetcher, WidgetProcessor,
+    NotificationService, ReportService, cache_service
+)
+from services.cache_service import CacheService
+from services.jinja_filters import format_number, timeago
+from services.json_provider import OrjsonProvider
+from blueprints import (
+    auth_bp, main_bp, admin_bp, data_sources_bp,
+    widgets_bp, dashboards_bp, api_bp, profile_bp
+)
 
 # ============================================================================
 # APPLICATION FACTORY
 # ============================================================================
 
-def create_app(config_name='default'):
+def create_app(config_name=None):
     """
     Application factory pattern for creating Flask app instances
     
     Args:
-        config_name: Configuration environment (development, production, testing)
+        config_name: Configuration environment (development, production, testing).
+            Defaults to the FLASK_ENV environment variable.
     
     Returns:
         Configured Flask application instance
     """
+    config_name = config_name or os.getenv('FLASK_ENV', 'development')
+    
     # Initialize Flask app
     app = Flask(__name__)
     
-    # Load configuration
-    from config import config
     app.config.from_object(config[config_name])
+    app.json = OrjsonProvider(app)
     
     # Jinja filters
-    from services.jinja_filters import format_number, timeago
     app.jinja_env.filters['format_number'] = format_number
     app.jinja_env.filters['timeago'] = timeago
 
@@ -49,6 +81,9 @@ def create_app(config_name='default'):
     # Register blueprints
     register_blueprints(app)
     
+    # Register request hooks
+    register_request_hooks(app)
+    
     # Register error handlers
     register_error_handlers(app)
     
@@ -58,12 +93,15 @@ def create_app(config_name='default'):
     # Register CLI commands
     register_cli_commands(app)
     
+    # Register shell context
+    register_shell_context(app)
+    
     # Log startup
     app.logger.info('='*80)
     app.logger.info('Kenya Transport Analytics Platform - Starting')
-    app.logger.info(f'Environment: {config_name}')
-    app.logger.info(f'Debug Mode: {app.debug}')
-    app.logger.info(f'Database: {app.config.get("SQLALCHEMY_DATABASE_URI", "Not configured")}')
+    app.logger.info('Environment: %s', config_name)
+    app.logger.info('Debug Mode: %s', app.debug)
+    app.logger.info('Database: %s', app.config.get('SQLALCHEMY_DATABASE_URI', 'Not configured'))
     app.logger.info('='*80)
     
     return app
@@ -73,14 +111,14 @@ def create_app(config_name='default'):
 # EXTENSION INITIALIZATION
 # ============================================================================
 
+# CORS settings, built once; the anchored pattern rejects non-API paths early
+CORS_API_PATTERN = re.compile(r'^/api/')
+CORS_METHODS = ('GET', 'POST', 'PUT', 'DELETE', 'OPTIONS')
+CORS_HEADERS = ('Content-Type', 'Authorization')
+
+
 def initialize_extensions(app):
     """Initialize Flask extensions"""
-    from models import db
-    from flask_login import LoginManager
-    from flask_bcrypt import Bcrypt
-    from services.cache_service import CacheService
-    
-    
     # Database
     db.init_app(app)
     
@@ -98,29 +136,37 @@ def initialize_extensions(app):
     
     @login_manager.user_loader
     def load_user(user_id):
-        from models import User
-        return User.query.get(int(user_id))
+        # Reuse the user already loaded during this request
+        cached = g.get('_user_cache')
+        if cached is not None and cached.id == int(user_id):
+            return cached
+        
+        # Organization and role are read on nearly every page; load them
+        # with the user instead of lazily one query at a time
+        user = db.session.get(
+            User, int(user_id),
+            options=[joinedload(User.organization), joinedload(User.role)]
+        )
+        g._user_cache = user
+        return user
     
-    # Bcrypt
-    bcrypt = Bcrypt(app)
-
     cache_service_instance = CacheService()
     cache_service_instance.init_app(app)
     app.cache = cache_service_instance
     
     # CORS
     CORS(app, resources={
-        r"/api/*": {
+        CORS_API_PATTERN: {
             "origins": app.config.get('CORS_ORIGINS', '*'),
-            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"]
+            "methods": CORS_METHODS,
+            "allow_headers": CORS_HEADERS,
+            "max_age": app.config.get('CORS_MAX_AGE', 86400)
         }
     })
     
     # Store extensions on app for easy access
     app.db = db
     app.login_manager = login_manager
-    app.bcrypt = bcrypt
     
     app.logger.info('Extensions initialized successfully')
 
@@ -129,80 +175,128 @@ def initialize_extensions(app):
 # BLUEPRINT REGISTRATION
 # ============================================================================
 
+# Blueprints with their URL prefixes
+BLUEPRINTS = (
+    (auth_bp, '/auth'),
+    (main_bp, '/'),
+    (admin_bp, '/admin'),
+    (data_sources_bp, '/data-sources'),
+    (widgets_bp, '/widgets'),
+    (dashboards_bp, '/dashboards'),
+    (api_bp, '/api'),
+    (profile_bp, '/profile')
+)
+
+
 def register_blueprints(app):
     """Register all application blueprints"""
-    from blueprints import (
-        auth_bp, main_bp, admin_bp, data_sources_bp,
-        widgets_bp, dashboards_bp, api_bp, profile_bp
-    )
-    
-    # Register blueprints with their URL prefixes
-    blueprints = [
-        (auth_bp, '/auth'),
-        (main_bp, '/'),
-        (admin_bp, '/admin'),
-        (data_sources_bp, '/data-sources'),
-        (widgets_bp, '/widgets'),
-        (dashboards_bp, '/dashboards'),
-        (api_bp, '/api'),
-        (profile_bp, '/profile')
-    ]
-    
-    for blueprint, url_prefix in blueprints:
+    for blueprint, url_prefix in BLUEPRINTS:
         app.register_blueprint(blueprint, url_prefix=url_prefix)
-        app.logger.info(f'Registered blueprint: {blueprint.name} at {url_prefix}')
+        app.logger.info('Registered blueprint: %s at %s', blueprint.name, url_prefix)
+
+
+# ============================================================================
+# REQUEST CLASSIFICATION
+# ============================================================================
+
+# First path segment -> route kind
+ROUTE_KINDS = {
+    'api': 'api',
+    'admin': 'admin',
+    'dashboards': 'dashboards',
+    'widgets': 'widgets',
+    'data-sources': 'data_sources',
+    'auth': 'auth',
+    'profile': 'profile',
+}
+
+
+def _route_kind():
+    """Classify the current request by its first path segment, once per request"""
+    if 'route_kind' not in g:
+        segment = request.path[1:].split('/', 1)[0]
+        g.route_kind = ROUTE_KINDS.get(segment)
+    return g.route_kind
+
+
+def register_request_hooks(app):
+    """Register per-request hooks"""
+    @app.before_request
+    def classify_request():
+        """Stash the route kind on g for handlers and templates"""
+        _route_kind()
+    
+    min_size = app.config.get('JSON_COMPRESS_MIN_SIZE', 1024)
+    
+    @app.after_request
+    def compress_json(response):
+        """Gzip large JSON bodies (widget and dashboard data) for clients that accept it"""
+        if (not min_size
+                or response.status_code != 200
+                or response.mimetype != 'application/json'
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers):
+            return response
+        
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+        
+        # Set on every eligible body, compressed or not, so caches key on it
+        response.vary.add('Accept-Encoding')
+        if request.accept_encodings['gzip']:
+            response.set_data(gzip.compress(body, compresslevel=5))
+            response.headers['Content-Encoding'] = 'gzip'
+            
+            # The gzip bytes differ from the identity body the ETag was made for
+            etag, weak = response.get_etag()
+            if etag and not weak:
+                response.set_etag(etag, weak=True)
+        return response
 
 
 # ============================================================================
 # ERROR HANDLERS
 # ============================================================================
 
+# Payloads for API error responses, keyed by status code
+ERROR_RESPONSES = {
+    403: ('Forbidden', 'You do not have permission to access this resource'),
+    404: ('Not Found', 'The requested resource was not found'),
+    429: ('Too Many Requests', 'Rate limit exceeded. Please try again later.'),
+    500: ('Internal Server Error', 'An unexpected error occurred'),
+}
+
+
+def _is_api():
+    """Check whether the current request targets the JSON API"""
+    return _route_kind() == 'api'
+
+
 def register_error_handlers(app):
     """Register error handlers for common HTTP errors"""
-    from flask import render_template, jsonify, request
-    
-    @app.errorhandler(403)
-    def forbidden(error):
-        if request.path.startswith('/api/'):
-            return jsonify({
-                'success': False,
-                'error': 'Forbidden',
-                'message': 'You do not have permission to access this resource'
-            }), 403
-        return render_template('errors/403.html'), 403
-    
-    @app.errorhandler(404)
-    def not_found(error):
-        if request.path.startswith('/api/'):
-            return jsonify({
-                'success': False,
-                'error': 'Not Found',
-                'message': 'The requested resource was not found'
-            }), 404
-        return render_template('errors/404.html'), 404
-    
-    @app.errorhandler(500)
-    def internal_error(error):
-        from models import db
-        db.session.rollback()
-        
-        if request.path.startswith('/api/'):
-            return jsonify({
-                'success': False,
-                'error': 'Internal Server Error',
-                'message': 'An unexpected error occurred'
-            }), 500
-        return render_template('errors/500.html'), 500
-    
-    @app.errorhandler(429)
-    def rate_limit_exceeded(error):
-        if request.path.startswith('/api/'):
-            return jsonify({
-                'success': False,
-                'error': 'Too Many Requests',
-                'message': 'Rate limit exceeded. Please try again later.'
-            }), 429
-        return render_template('errors/429.html'), 429
+    def make_handler(code):
+        error_name, message = ERROR_RESPONSES[code]
+        
+        # The API body never changes, so serialize it once at registration
+        api_body = app.json.dumps({
+            'success': False,
+            'error': error_name,
+            'message': message
+        }) + '\n'
+        
+        def handle_error(error):
+            if code == 500:
+                db.session.rollback()
+            
+            if _is_api():
+                return app.response_class(api_body, status=code, mimetype='application/json')
+            return render_template(f'errors/{code}.html'), code
+        
+        return handle_error
+    
+    for code in ERROR_RESPONSES:
+        app.register_error_handler(code, make_handler(code))
     
     app.logger.info('Error handlers registered')
 
@@ -211,25 +305,36 @@ def register_error_handlers(app):
 # CONTEXT PROCESSORS
 # ============================================================================
 
+# Cached (year, expires_at) for templates; the year is re-read at most hourly
+_current_year = [datetime.utcnow().year, time.monotonic() + 3600]
+
+
+def _get_current_year():
+    """Return the current UTC year without building a datetime per request"""
+    now = time.monotonic()
+    if now >= _current_year[1]:
+        _current_year[0] = datetime.utcnow().year
+        _current_year[1] = now + 3600
+    return _current_year[0]
+
+
 def register_context_processors(app):
     """Register context processors for templates"""
-    from flask_login import current_user
-    from models import Notification
-    
     @app.context_processor
     def inject_globals():
         """Inject global variables into all templates"""
+        # JSON API responses never use template globals
+        if _is_api():
+            return {}
+        
         unread_notifications = 0
         if current_user.is_authenticated:
-            unread_notifications = Notification.query.filter_by(
-                user_id=current_user.id,
-                is_read=False
-            ).count()
+            unread_notifications = NotificationService.get_unread_count(current_user.id)
         
         return {
             'app_name': 'Kenya Transport Analytics',
             'app_version': '1.0.0',
-            'current_year': datetime.utcnow().year,
+            'current_year': _get_current_year(),
             'unread_notifications': unread_notifications,
             'debug_mode': app.debug
         }
@@ -243,24 +348,28 @@ def register_context_processors(app):
 
 def register_cli_commands(app):
     """Register custom CLI commands"""
-    import click
-    from models import db
 
     @app.cli.command("fix-db")
     def fix_database():
         """Fix database schema issues"""
         print("Checking database schema...")
         
-        # Check permissions table
-        from sqlalchemy import inspect, text
-        inspector = inspect(db.engine)
+        # Check permissions table; a single catalog query on PostgreSQL
+        if db.engine.dialect.name == 'postgresql':
+            columns = set(db.session.execute(text(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = 'permissions'"
+            )).scalars())
+        else:
+            inspector = inspect(db.engine)
+            columns = {col['name'] for col in inspector.get_columns('permissions')} \
+                if inspector.has_table('permissions') else set()
         
-        if 'permissions' not in inspector.get_table_names():
+        if not columns:
             print("Permissions table doesn't exist. Creating all tables...")
             db.create_all()
             print("✓ Tables created")
         else:
-            columns = {col['name'] for col in inspector.get_columns('permissions')}
             print(f"Current permissions columns: {columns}")
             
             # Check for missing columns
@@ -284,7 +393,6 @@ def register_cli_commands(app):
                 db.session.commit()
                 
                 # Recreate table
-                from models.permission import Permission
                 db.create_all()
                 
                 print("✓ Permissions table recreated with correct schema")
@@ -299,8 +407,6 @@ def register_cli_commands(app):
     @app.cli.command("reset-db")
     def reset_db():
         """Drop and recreate all tables"""
-        from sqlalchemy import text, inspect
-        
         print("Dropping all tables with CASCADE...")
         
         try:
@@ -311,10 +417,11 @@ def register_cli_commands(app):
             # Disable foreign key checks (PostgreSQL specific)
             db.session.execute(text('SET session_replication_role = replica;'))
             
-            # Drop all tables
-            for table in tables:
-                print(f"Dropping table: {table}")
-                db.session.execute(text(f'DROP TABLE IF EXISTS "{table}" CASCADE;'))
+            # Drop all tables in a single statement
+            if tables:
+                print(f"Dropping tables: {', '.join(tables)}")
+                table_list = ', '.join(f'"{table}"' for table in tables)
+                db.session.execute(text(f'DROP TABLE IF EXISTS {table_list} CASCADE;'))
             
             db.session.commit()
             
@@ -347,17 +454,14 @@ def register_cli_commands(app):
         click.echo('✓ Database tables created')
         
         click.echo('Creating default permissions...')
-        from models.permission import create_default_permissions
         create_default_permissions()
         click.echo('✓ Default permissions created')
         
         click.echo('Creating default roles...')
-        from models.permission import create_default_roles
         create_default_roles()
         click.echo('✓ Default roles created')
         
         click.echo('Creating system organization...')
-        from models import Organization
         system_org = Organization.query.filter_by(code='SYSTEM').first()
         if not system_org:
             system_org = Organization(
@@ -374,16 +478,18 @@ def register_cli_commands(app):
             click.echo('✓ System organization already exists')
         
         click.echo('Creating admin user...')
-        from models import User, Role
-        admin_user = User.query.filter_by(email='admin@transport.go.ke').first()
-        if not admin_user:
-            admin_role = Role.query.filter_by(code='super_admin').first()
+        # Admin existence check and role lookup in one round-trip
+        admin_user_id, admin_role_id = db.session.execute(select(
+            select(User.id).where(User.email == 'admin@transport.go.ke').scalar_subquery(),
+            select(Role.id).where(Role.code == 'super_admin').scalar_subquery()
+        )).one()
+        if not admin_user_id:
             admin_user = User(
                 email='admin@transport.go.ke',
                 first_name='System',
                 last_name='Administrator',
                 organization_id=system_org.id,
-                role_id=admin_role.id,
+                role_id=admin_role_id,
                 is_active=True,
                 is_superuser=True
             )
@@ -410,8 +516,6 @@ def register_cli_commands(app):
     @click.option('--type', default='Transport Authority', help='Organization type')
     def create_org(name, code, type):
         """Create a new organization"""
-        from models import Organization
-        
         org = Organization.query.filter_by(code=code.upper()).first()
         if org:
             click.echo(f'❌ Organization with code {code} already exists')
@@ -437,20 +541,21 @@ def register_cli_commands(app):
     @click.option('--role-code', default='analyst', help='Role code')
     def create_user(email, password, first_name, last_name, org_code, role_code):
         """Create a new user"""
-        from models import User, Organization, Role
-        
         user = User.query.filter_by(email=email.lower()).first()
         if user:
             click.echo(f'❌ User with email {email} already exists')
             return
         
-        org = Organization.query.filter_by(code=org_code.upper()).first()
-        if not org:
+        # Resolve organization and role in a single round-trip
+        org_id, role_id = db.session.execute(select(
+            select(Organization.id).where(Organization.code == org_code.upper()).scalar_subquery(),
+            select(Role.id).where(Role.code == role_code).scalar_subquery()
+        )).one()
+        if not org_id:
             click.echo(f'❌ Organization with code {org_code} not found')
             return
         
-        role = Role.query.filter_by(code=role_code).first()
-        if not role:
+        if not role_id:
             click.echo(f'❌ Role with code {role_code} not found')
             return
         
@@ -458,8 +563,8 @@ def register_cli_commands(app):
             email=email.lower(),
             first_name=first_name,
             last_name=last_name,
-            organization_id=org.id,
-            role_id=role.id,
+            organization_id=org_id,
+            role_id=role_id,
             is_active=True
         )
         user.set_password(password)
@@ -473,8 +578,6 @@ def register_cli_commands(app):
     @click.argument('new_password')
     def reset_password(email, new_password):
         """Reset user password"""
-        from models import User
-        
         user = User.query.filter_by(email=email.lower()).first()
         if not user:
             click.echo(f'❌ User with email {email} not found')
@@ -489,8 +592,6 @@ def register_cli_commands(app):
     @click.option('--org-code', help='Filter by organization code')
     def list_users(org_code):
         """List all users"""
-        from models import User, Organization
-        
         query = User.query
         if org_code:
             org = Organization.query.filter_by(code=org_code.upper()).first()
@@ -499,16 +600,18 @@ def register_cli_commands(app):
                 return
             query = query.filter_by(organization_id=org.id)
         
-        users = query.all()
+        total = query.count()
         
-        if not users:
+        if not total:
             click.echo('No users found')
             return
         
-        click.echo(f'\nFound {len(users)} user(s):\n')
+        click.echo(f'\nFound {total} user(s):\n')
         click.echo(f'{"ID":<5} {"Email":<30} {"Name":<30} {"Organization":<20} {"Status":<10}')
         click.echo('-' * 100)
         
+        # Stream rows in batches rather than materializing the whole table
+        users = query.options(joinedload(User.organization)).order_by(User.id).yield_per(500)
         for user in users:
             status = 'Active' if user.is_active else 'Inactive'
             org_name = user.organization.code if user.organization else 'N/A'
@@ -517,8 +620,6 @@ def register_cli_commands(app):
     @app.cli.command('cleanup')
     def cleanup():
         """Clean up expired notifications and sessions"""
-        from services import NotificationService
-        
         click.echo('Cleaning up expired notifications...')
         count = NotificationService.cleanup_expired()
         click.echo(f'✓ Removed {count} expired notifications')
@@ -532,105 +633,147 @@ def register_cli_commands(app):
 # LOGGING CONFIGURATION
 # ============================================================================
 
+# One queue and listener thread per process. Threads don't survive fork(),
+# so a Gunicorn worker (preload_app) or a Celery child starts its own on
+# first use instead of inheriting the master's dead one.
+_log_state = {'pid': None, 'queue': None, 'listener': None}
+_log_lock = threading.Lock()
+
+
+def _reset_log_lock():
+    """Replace the lock in a forked child in case it was held during fork"""
+    global _log_lock
+    _log_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_log_lock)
+
+
+def _build_log_handlers():
+    """Create the rotating file handlers written by the listener thread"""
+    # Create logs directory if it doesn't exist
+    Path('logs').mkdir(exist_ok=True)
+    
+    # File handler for general logs
+    file_handler = RotatingFileHandler(
+        'logs/transport_analytics.log',
+        maxBytes=10240000,  # 10MB
+        backupCount=10
+    )
+    file_handler.setFormatter(logging.Formatter(
+        '[%(asctime)s] %(levelname)s in %(module)s: %(message)s'
+    ))
+    file_handler.setLevel(logging.INFO)
+    
+    # File handler for errors
+    error_handler = RotatingFileHandler(
+        'logs/errors.log',
+        maxBytes=10240000,
+        backupCount=10
+    )
+    error_handler.setFormatter(logging.Formatter(
+        '[%(asctime)s] %(levelname)s in %(module)s: %(message)s\n'
+        'Path: %(pathname)s:%(lineno)d\n'
+        '%(message)s\n'
+    ))
+    error_handler.setLevel(logging.ERROR)
+    
+    return file_handler, error_handler
+
+
+def _process_log_queue():
+    """Return this process's log queue, starting its listener on first use"""
+    pid = os.getpid()
+    if _log_state['pid'] == pid:
+        return _log_state['queue']
+    
+    with _log_lock:
+        if _log_state['pid'] != pid:
+            log_queue = queue.Queue(-1)
+            listener = QueueListener(
+                log_queue, *_build_log_handlers(),
+                respect_handler_level=True
+            )
+            listener.start()
+            atexit.register(listener.stop)
+            _log_state.update(pid=pid, queue=log_queue, listener=listener)
+    
+    return _log_state['queue']
+
+
+class ProcessQueueHandler(QueueHandler):
+    """QueueHandler that feeds the listener owned by the current process"""
+    
+    def __init__(self):
+        super().__init__(None)
+    
+    def enqueue(self, record):
+        _process_log_queue().put_nowait(record)
+
+
 def setup_logging(app):
     """Configure application logging"""
     if not app.debug:
-        # Create logs directory if it doesn't exist
-        if not os.path.exists('logs'):
-            os.mkdir('logs')
-        
-        # File handler for general logs
-        file_handler = RotatingFileHandler(
-            'logs/transport_analytics.log',
-            maxBytes=10240000,  # 10MB
-            backupCount=10
-        )
-        file_handler.setFormatter(logging.Formatter(
-            '[%(asctime)s] %(levelname)s in %(module)s: %(message)s'
-        ))
-        file_handler.setLevel(logging.INFO)
-        app.logger.addHandler(file_handler)
-        
-        # File handler for errors
-        error_handler = RotatingFileHandler(
-            'logs/errors.log',
-            maxBytes=10240000,
-            backupCount=10
-        )
-        error_handler.setFormatter(logging.Formatter(
-            '[%(asctime)s] %(levelname)s in %(module)s: %(message)s\n'
-            'Path: %(pathname)s:%(lineno)d\n'
-            '%(message)s\n'
-        ))
-        error_handler.setLevel(logging.ERROR)
-        app.logger.addHandler(error_handler)
+        # Hand records to a background listener so request threads never
+        # block on file writes or rollover checks. Apps share a logger by
+        # name, so repeated create_app() calls attach the handler once.
+        if not any(isinstance(h, ProcessQueueHandler) for h in app.logger.handlers):
+            app.logger.addHandler(ProcessQueueHandler())
         
         app.logger.setLevel(logging.INFO)
         app.logger.info('Logging configured')
 
 
-# ============================================================================
-# APPLICATION INSTANCE
-# ============================================================================
-
-# Create application instance
-app = create_app(os.getenv('FLASK_ENV', 'development'))
-
-
 # ============================================================================
 # SHELL CONTEXT
 # ============================================================================
 
-@app.shell_context_processor
-def make_shell_context():
-    """
-    Make models available in Flask shell
-    Usage: flask shell
-    """
-    from models import (
-        db, Organization, User, Role, Permission,
-        DataSource, Widget, Dashboard, DashboardWidget,
-        AuditLog, Notification, APIKey, DataRefreshLog
-    )
-    from services import (
-        AuthService, DataFetcher, WidgetProcessor,
-        NotificationService, ReportService, cache_service
-    )
-    
-    return {
-        'db': db,
-        'Organization': Organization,
-        'User': User,
-        'Role': Role,
-        'Permission': Permission,
-        'DataSource': DataSource,
-        'Widget': Widget,
-        'Dashboard': Dashboard,
-        'DashboardWidget': DashboardWidget,
-        'AuditLog': AuditLog,
-        'Notification': Notification,
-        'APIKey': APIKey,
-        'DataRefreshLog': DataRefreshLog,
-        'AuthService': AuthService,
-        'DataFetcher': DataFetcher,
-        'WidgetProcessor': WidgetProcessor,
-        'NotificationService': NotificationService,
-        'ReportService': ReportService,
-        'cache': cache_service
-    }
+def register_shell_context(app):
+    """Make models and services available in the Flask shell"""
+    @app.shell_context_processor
+    def make_shell_context():
+        """
+        Make models available in Flask shell
+        Usage: flask shell
+        """
+        return {
+            'db': db,
+            'Organization': Organization,
+            'User': User,
+            'Role': Role,
+            'Permission': Permission,
+            'DataSource': DataSource,
+            'Widget': Widget,
+            'Dashboard': Dashboard,
+            'DashboardWidget': DashboardWidget,
+            'AuditLog': AuditLog,
+            'Notification': Notification,
+            'APIKey': APIKey,
+            'DataRefreshLog': DataRefreshLog,
+            'AuthService': AuthService,
+            'DataFetcher': DataFetcher,
+            'WidgetProcessor': WidgetProcessor,
+            'NotificationService': NotificationService,
+            'ReportService': ReportService,
+            'cache': cache_service
+        }
+
 
 # ============================================================================
 # MAIN ENTRY POINT
 # ============================================================================
 
 if __name__ == '__main__':
+    app = create_app()
+    
     # Development server configuration
     port = int(os.environ.get('PORT', 5000))
     host = os.environ.get('HOST', '0.0.0.0')
-    debug = os.environ.get('FLASK_DEBUG', 'True').lower() == 'true'
+    # Follow the config's DEBUG unless explicitly overridden, so production never runs the reloader
+    debug = os.environ.get('FLASK_DEBUG', str(app.debug)).lower() == 'true'
     
-    app.logger.info(f'Starting development server on {host}:{port}')
-    app.logger.info(f'Debug mode: {debug}')
+    app.logger.info('Starting development server on %s:%s', host, port)
+    app.logger.info('Debug mode: %s', debug)
     app.logger.info('Press CTRL+C to quit')
     
     app.run(
@@ -3,9 +3,14 @@ Main and Admin Blueprints
 Main dashboard and administrative functions
 """
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request, abort
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, current_app
 from flask_login import login_required, current_user
 from functools import wraps
+from datetime import datetime
+import hashlib
+import re
+import orjson
+from sqlalchemy.orm import load_only, selectinload
 from models import (
     Organization, User, Role, Permission,
     Dashboard, Widget, DataSource, AuditLog, db
@@ -65,24 +70,31 @@ def dashboard():
         is_active=True
     ).first()
     
-    # Get user statistics
-    stats = {
-        'dashboards': Dashboard.query.filter_by(
-            organization_id=current_user.organization_id,
-            is_active=True
-        ).count(),
-        'widgets': Widget.query.join(DataSource).filter(
-            DataSource.organization_id == current_user.organization_id,
-            Widget.is_active == True
-        ).count(),
-        'data_sources': DataSource.query.filter_by(
-            organization_id=current_user.organization_id,
-            is_active=True
-        ).count()
-    }
+    # Get user statistics (three counts, one round trip), cached per organization
+    organization_id = current_user.organization_id
+    stats = current_app.cache.get_or_set(
+        f'org:{organization_id}:dashboard_stats',
+        lambda: db.session.execute(db.select(
+            db.select(db.func.count(Dashboard.id)).where(
+                Dashboard.organization_id == organization_id,
+                Dashboard.is_active == True
+            ).scalar_subquery().label('dashboards'),
+            db.select(db.func.count(Widget.id)).join(DataSource).where(
+                DataSource.organization_id == organization_id,
+                Widget.is_active == True
+            ).scalar_subquery().label('widgets'),
+            db.select(db.func.count(DataSource.id)).where(
+                DataSource.organization_id == organization_id,
+                DataSource.is_active == True
+            ).scalar_subquery().label('data_sources')
+        )).one()._asdict(),
+        ttl=current_app.config.get('DASHBOARD_STATS_TTL', 60)
+    )
     
     # Get recent dashboards
-    recent_dashboards = Dashboard.query.filter_by(
+    recent_dashboards = Dashboard.query.with_entities(
+        Dashboard.id, Dashboard.name, Dashboard.last_viewed
+    ).filter_by(
         organization_id=current_user.organization_id,
         is_active=True
     ).order_by(Dashboard.last_viewed.desc()).limit(5).all()
@@ -155,12 +167,13 @@ def mark_notification_read(notification_id):
     """Mark notification as read"""
     from models import Notification
     
-    notification = Notification.query.get_or_404(notification_id)
+    notification = db.get_or_404(Notification, notification_id)
     
     if notification.user_id != current_user.id:
         abort(403)
     
     notification.mark_as_read()
+    current_app.cache.clear_unread_notifications(current_user.id)
     
     return redirect(url_for('main.notifications'))
 @main_bp.route('/analytics')
@@ -176,38 +189,59 @@ def reports():
     return render_template('components/reports.html')
 
 # API endpoints for analytics data (referenced in analytics.html)
-@main_bp.route('/analytics/revenue-data')
-@login_required
-def get_revenue_data():
-    """Return JSON data for revenue chart"""
-    # TODO: Replace with actual database queries
-    data = {
-        'labels': ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun'],
-        'values': [45000, 52000, 48000, 61000, 55000, 67000]
-    }
-    return jsonify(data)
-
-@main_bp.route('/analytics/demographics-data')
-@login_required
-def get_demographics_data():
-    """Return JSON data for demographics pie chart"""
-    # TODO: Replace with actual database queries
-    data = {
-        'labels': ['Students', 'Adults', 'Seniors', 'Corporate'],
-        'values': [35, 45, 10, 10]
-    }
-    return jsonify(data)
-
-@main_bp.route('/analytics/peak-hours-data')
+# TODO: Replace with actual database queries
+# The chart payloads are static, so build and serialize them once at import.
+# Column-oriented tuples: shared, immutable, and the shape Chart.js consumes
+MONTH_LABELS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun')
+
+REVENUE_DATA = {
+    'labels': MONTH_LABELS,
+    'values': (45000, 52000, 48000, 61000, 55000, 67000)
+}
+DEMOGRAPHICS_DATA = {
+    'labels': ('Students', 'Adults', 'Seniors', 'Corporate'),
+    'values': (35, 45, 10, 10)
+}
+PEAK_HOURS_DATA = {
+    'labels': ('6AM', '9AM', '12PM', '3PM', '6PM', '9PM'),
+    'values': (120, 450, 280, 310, 520, 180)
+}
+
+# Feed slug -> (serialized body, ETag), served by analytics_feed below
+ANALYTICS_FEEDS = {}
+for _name, _data in (
+    ('revenue-data', REVENUE_DATA),
+    ('demographics-data', DEMOGRAPHICS_DATA),
+    ('peak-hours-data', PEAK_HOURS_DATA),
+):
+    _body = orjson.dumps(_data)
+    ANALYTICS_FEEDS[_name] = (_body, hashlib.blake2b(_body, digest_size=8).hexdigest())
+
+
+def _analytics_feed_response(name):
+    """Serve a precomputed analytics feed, answering 304 when the client's copy is current"""
+    body, etag = ANALYTICS_FEEDS[name]
+    
+    # If-None-Match uses weak comparison, so gzipped copies (W/ tags) revalidate too
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        # Hand the prebuilt bytes straight to the WSGI server
+        response = current_app.response_class(body, mimetype='application/json')
+        response.direct_passthrough = True
+    
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = 60
+    return response
+
+
+@main_bp.route("/analytics/<any('revenue-data', 'demographics-data', 'peak-hours-data'):feed>",
+               methods=['GET'], provide_automatic_options=False)
 @login_required
-def get_peak_hours_data():
-    """Return JSON data for peak hours bar chart"""
-    # TODO: Replace with actual database queries
-    data = {
-        'labels': ['6AM', '9AM', '12PM', '3PM', '6PM', '9PM'],
-        'values': [120, 450, 280, 310, 520, 180]
-    }
-    return jsonify(data)
+def analytics_feed(feed):
+    """Return JSON data for an analytics chart (revenue, demographics, peak hours)"""
+    return _analytics_feed_response(feed)
 
 # ============================================================================
 # ADMIN BLUEPRINT
@@ -224,7 +258,12 @@ admin_bp = Blueprint('admin', __name__)
 @permission_required('view_organizations')
 def organizations():
     """List all organizations"""
-    orgs = Organization.query.order_by(Organization.name).all()
+    orgs = Organization.query.options(
+        load_only(
+            Organization.id, Organization.name, Organization.code,
+            Organization.org_type, Organization.is_active
+        )
+    ).order_by(Organization.name).all()
     return render_template('admin/organizations.html', organizations=orgs)
 
 
@@ -283,7 +322,7 @@ def create_organization():
 @permission_required('edit_organization')
 def edit_organization(id):
     """Edit organization"""
-    org = Organization.query.get_or_404(id)
+    org = db.get_or_404(Organization, id)
     form = OrganizationForm(obj=org, original_code=org.code)
     
     if form.validate_on_submit():
@@ -331,7 +370,7 @@ def edit_organization(id):
 @permission_required('delete_organization')
 def delete_organization(id):
     """Delete organization"""
-    org = Organization.query.get_or_404(id)
+    org = db.get_or_404(Organization, id)
     
     # Prevent deleting system organization
     if org.code == 'SYSTEM':
@@ -355,6 +394,92 @@ def delete_organization(id):
 # Users
 # ----------------------------------------------------------------------------
 
+def _keyset_page(query, model):
+    """
+    Fetch one newest-first page of a listing using keyset pagination
+    
+    Pages are keyed on (created_at, id) through the ?after= cursor, so
+    each page is an index range scan instead of a growing OFFSET.
+    
+    Args:
+        query: Filtered query over model
+        model: Model with created_at and id columns
+        
+    Returns:
+        tuple: (rows, next_url) where next_url is None on the last page
+    """
+    page_size = current_app.config.get('ADMIN_PAGE_SIZE', 50)
+    
+    after = request.args.get('after')
+    if after:
+        try:
+            created_at, last_id = after.rsplit(',', 1)
+            cursor = (datetime.fromisoformat(created_at), int(last_id))
+        except ValueError:
+            abort(400)
+        query = query.filter(db.tuple_(model.created_at, model.id) < cursor)
+    
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(page_size + 1).all()
+    
+    next_url = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        args = request.args.to_dict()
+        args['after'] = f'{last.created_at.isoformat()},{last.id}'
+        next_url = url_for(request.endpoint, **args)
+    
+    return rows, next_url
+
+
+# A complete address: something@domain.tld with no spaces
+FULL_EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+
+def _like_escape(value):
+    """Escape LIKE wildcards in user input so they match literally"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _user_search_filter(search):
+    """
+    Build the filter for the admin user search box
+    
+    A complete email address is matched as an anchored prefix of
+    users.email (stored lowercase), which the text_pattern_ops index
+    serves. Multi-word input on PostgreSQL is matched against the
+    GIN-indexed users_search_tsv expression. Everything else, including
+    partial addresses, uses substring ILIKE, which the trigram indexes
+    cover.
+    
+    Args:
+        search: Raw search text
+        
+    Returns:
+        SQL expression to pass to Query.filter
+    """
+    pattern = _like_escape(search)
+    
+    if FULL_EMAIL_PATTERN.match(search):
+        return User.email.like(f'{pattern.lower()}%', escape='\\')
+    
+    if len(search.split()) > 1 and db.engine.dialect.name == 'postgresql':
+        # Must match the indexed expression in the users_search_tsv_gin migration
+        search_vector = db.func.to_tsvector(
+            'simple',
+            db.func.coalesce(User.email, '') + ' ' +
+            db.func.coalesce(User.first_name, '') + ' ' +
+            db.func.coalesce(User.last_name, '')
+        )
+        return search_vector.op('@@')(db.func.plainto_tsquery('simple', search))
+    
+    return db.or_(
+        User.email.ilike(f'%{pattern}%', escape='\\'),
+        User.first_name.ilike(f'%{pattern}%', escape='\\'),
+        User.last_name.ilike(f'%{pattern}%', escape='\\')
+    )
+
+
 @admin_bp.route('/users')
 @login_required
 @permission_required('view_users')
@@ -380,18 +505,19 @@ def users():
         users_query = users_query.filter_by(role_id=int(role_id))
     
     if search:
-        users_query = users_query.filter(
-            db.or_(
-                User.email.ilike(f'%{search}%'),
-                User.first_name.ilike(f'%{search}%'),
-                User.last_name.ilike(f'%{search}%')
-            )
-        )
-    
-    users_list = users_query.order_by(User.created_at.desc()).all()
-    roles = Role.query.filter_by(is_active=True).all()
+        users_query = users_query.filter(_user_search_filter(search))
+    
+    # The listing shows each user's role and organization
+    users_list, next_url = _keyset_page(
+        users_query.options(
+            selectinload(User.role),
+            selectinload(User.organization)
+        ),
+        User
+    )
+    roles = Role.get_active_choices()
     
-    return render_template('admin/users.html', users=users_list, roles=roles)
+    return render_template('admin/users.html', users=users_list, roles=roles, next_url=next_url)
 
 
 @admin_bp.route('/users/create', methods=['GET', 'POST'])
@@ -403,24 +529,31 @@ def create_user():
     
     # Populate choices
     if current_user.is_superuser:
-        form.organization.choices = [
-            (o.id, o.name) for o in Organization.query.filter_by(is_active=True).all()
-        ]
+        form.organization.choices = Organization.get_active_choices()
     else:
         form.organization.choices = [
             (current_user.organization_id, current_user.organization.name)
         ]
     
-    form.role.choices = [
-        (r.id, r.name) for r in Role.query.filter_by(is_active=True).all()
-    ]
+    form.role.choices = Role.get_active_choices()
     
     if form.validate_on_submit():
         try:
-            # Check organization user limit
-            org = Organization.query.get(form.organization.data)
-            if not org.can_add_user():
-                flash(f'Organization has reached maximum user limit ({org.max_users}).', 'danger')
+            # Check organization user limit in one query; the organization row
+            # stays locked until commit so concurrent creates cannot both pass
+            max_users, user_count = db.session.execute(
+                db.select(
+                    Organization.max_users,
+                    db.select(db.func.count(User.id)).where(
+                        User.organization_id == Organization.id,
+                        User.is_active == True
+                    ).scalar_subquery()
+                ).where(
+                    Organization.id == form.organization.data
+                ).with_for_update(of=Organization)
+            ).one()
+            if user_count >= max_users:
+                flash(f'Organization has reached maximum user limit ({max_users}).', 'danger')
                 return render_template('admin/user_form.html', form=form, action='Create')
             
             user = User(
@@ -474,7 +607,7 @@ def create_user():
 @permission_required('edit_user')
 def edit_user(id):
     """Edit user"""
-    user = User.query.get_or_404(id)
+    user = db.get_or_404(User, id)
     
     # Check permission (can only edit users in same organization unless superuser)
     if not current_user.is_superuser and user.organization_id != current_user.organization_id:
@@ -484,17 +617,13 @@ def edit_user(id):
     
     # Populate choices
     if current_user.is_superuser:
-        form.organization.choices = [
-            (o.id, o.name) for o in Organization.query.filter_by(is_active=True).all()
-        ]
+        form.organization.choices = Organization.get_active_choices()
     else:
         form.organization.choices = [
             (current_user.organization_id, current_user.organization.name)
         ]
     
-    form.role.choices = [
-        (r.id, r.name) for r in Role.query.filter_by(is_active=True).all()
-    ]
+    form.role.choices = Role.get_active_choices()
     
     if form.validate_on_submit():
         try:
@@ -538,7 +667,7 @@ def edit_user(id):
 @permission_required('delete_user')
 def delete_user(id):
     """Delete user"""
-    user = User.query.get_or_404(id)
+    user = db.get_or_404(User, id)
     
     # Check permission
     if not current_user.is_superuser and user.organization_id != current_user.organization_id:
@@ -580,12 +709,22 @@ def roles():
 @permission_required('view_roles')
 def view_role(id):
     """View role details"""
-    role = Role.query.get_or_404(id)
+    role = db.get_or_404(Role, id)
     return render_template('admin/role_detail.html', role=role)
 
 @admin_bp.route('/audit-logs')
 @login_required
 @permission_required('view_audit_logs')
 def audit_logs():
-    logs = AuditLog.query.order_by(AuditLog.created_at.desc()).limit(500).all()
-    return render_template('admin/audit_logs.html', logs=logs)
\ No newline at end of file
+    # Skip the JSON value snapshots and request details the listing never shows
+    logs, next_url = _keyset_page(
+        AuditLog.query.options(
+            load_only(
+                AuditLog.id, AuditLog.created_at, AuditLog.user_id, AuditLog.action,
+                AuditLog.resource_type, AuditLog.resource_id, AuditLog.description
+            ),
+            selectinload(AuditLog.user)
+        ),
+        AuditLog
+    )
+    return render_template('admin/audit_logs.html', logs=logs, next_url=next_url)
\ No newline at end of file
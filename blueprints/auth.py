@@ -4,18 +4,21 @@ Authentication Blueprint
 User login, logout, password management, 2FA
 """
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session, jsonify, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, jsonify, current_app, make_response
 from flask_login import login_user, logout_user, current_user, login_required
 from forms import LoginForm, TwoFAForm, TwoFASetupForm, PasswordResetRequestForm, PasswordResetForm, ChangePasswordForm, ProfileForm, RegisterForm
 from services import AuthService
 from models import User, db, AuditLog, AuditAction, Organization, Role, Dashboard
-import pyotp
-import qrcode
-import io
-import base64
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
+# Matches the String(255) user_agent columns on users and audit_logs
+USER_AGENT_MAX_LENGTH = 255
+
+def _user_agent():
+    """Raw User-Agent header, truncated to fit the user_agent columns"""
+    return request.headers.get('User-Agent', '')[:USER_AGENT_MAX_LENGTH]
+
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
     """User login"""
@@ -27,7 +30,7 @@ def login():
     if form.validate_on_submit():
         # Get client info
         ip_address = request.remote_addr
-        user_agent = request.headers.get('User-Agent', '')
+        user_agent = _user_agent()
         
         # Authenticate user
         result = AuthService.authenticate(
@@ -43,17 +46,17 @@ def login():
                 flash('Please enter your 2FA code to continue.', 'info')
                 return redirect(url_for('auth.verify_2fa'))
             
-            # Login successful
-            user = User.query.get(result['user']['id'])
-            login_user(user, remember=form.remember.data)
+            # Login successful; AuthService already logged the user in
             flash('Login successful!', 'success')
-            user_dashboard = Dashboard.query.filter_by(
-                organization_id=current_user.organization_id,
-                is_active=True
-            ).first()
+            user_dashboard_id = db.session.execute(
+                db.select(Dashboard.id).where(
+                    Dashboard.organization_id == current_user.organization_id,
+                    Dashboard.is_active == True
+                ).limit(1)
+            ).scalar()
 
-            if user_dashboard:
-                return redirect(url_for('dashboards.view', id=user_dashboard.id))
+            if user_dashboard_id:
+                return redirect(url_for('dashboards.view', id=user_dashboard_id))
             else:
                 return redirect(url_for('main.index'))
         else:
@@ -74,7 +77,7 @@ def verify_2fa():
         result = AuthService.verify_2fa(form.token.data)
         
         if result['success']:
-            user = User.query.get(result['user']['id'])
+            user = db.session.get(User, result['user']['id'])
             login_user(user, remember=session.get('2fa_remember', False))
             flash('Login successful!', 'success')
             
@@ -99,27 +102,9 @@ def setup_2fa():
     form = TwoFASetupForm()
     
     if request.method == 'GET':
-        # Generate secret and QR code
-        secret = current_user.generate_2fa_secret()
+        # Reuse a pending secret so refreshes are served from the cached QR code
+        secret = current_user.two_fa_secret or current_user.generate_2fa_secret()
         form.secret.data = secret
-        
-        # Generate QR code
-        totp = pyotp.TOTP(secret)
-        uri = totp.provisioning_uri(
-            name=current_user.email,
-            issuer_name='Kenya Transport Analytics'
-        )
-        
-        # Create QR code
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(uri)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Convert to base64
-        buffer = io.BytesIO()
-        img.save(buffer, format='PNG')
-        qr_code = base64.b64encode(buffer.getvalue()).decode()
     
     if form.validate_on_submit():
         result = AuthService.enable_2fa(current_user, form.token.data)
@@ -127,30 +112,88 @@ def setup_2fa():
         if result['success']:
             flash('2FA enabled successfully!', 'success')
             
-            # Show backup codes
-            session['backup_codes'] = result['backup_codes']
-            return redirect(url_for('auth.show_backup_codes'))
+            # Show backup codes once; they never round-trip through the session cookie
+            response = make_response(render_template(
+                'auth/backup_codes.html',
+                backup_codes=result['backup_codes'],
+                title='Backup Codes'
+            ))
+            # Keep the codes out of browser and proxy caches
+            response.headers['Cache-Control'] = 'no-store'
+            return response
         else:
             flash(result['message'], 'danger')
     
+    # Also shown again when verification fails, without re-rendering the QR code
+    secret = current_user.two_fa_secret
+    qr_code = None
+    if secret:
+        secret_digest = AuthService.totp_secret_digest(secret)
+        qr_code = current_app.cache.get(AuthService.totp_qr_cache_key(current_user.id, secret_digest))
+        if qr_code is None:
+            qr_code = _queue_totp_qr(current_user, secret_digest)
+    
     return render_template(
         'auth/setup_2fa.html',
         form=form,
-        qr_code=qr_code if 'qr_code' in locals() else None,
-        secret=secret if 'secret' in locals() else None,
+        qr_code=qr_code,
+        secret=secret,
         title='Setup Two-Factor Authentication'
     )
 
-@auth_bp.route('/backup-codes')
+def _render_totp_qr(user, secret_digest):
+    """Render the QR code in the request and cache it for later polls"""
+    qr_code = AuthService.render_totp_qr(user.get_2fa_uri())
+    current_app.cache.set(
+        AuthService.totp_qr_cache_key(user.id, secret_digest),
+        qr_code,
+        ttl=current_app.config['TWOFA_QR_TTL']
+    )
+    return qr_code
+
+def _queue_totp_qr(user, secret_digest):
+    """
+    Queue QR rendering for a 2FA secret, rendering inline when it can't be queued
+    
+    Returns:
+        str: Base64 PNG when rendered inline, None when the page should poll for it
+    """
+    if current_app.cache.enabled:
+        try:
+            from tasks.twofa import render_totp_qr_task
+            render_totp_qr_task.delay(user.id, secret_digest)
+            
+            # Polls wait this long for a worker before rendering inline
+            current_app.cache.set(
+                AuthService.totp_qr_pending_key(user.id, secret_digest),
+                True,
+                ttl=current_app.config['TWOFA_QR_RENDER_TIMEOUT']
+            )
+            return None
+        except Exception as e:
+            current_app.logger.warning(f'QR render task not queued: {str(e)}')
+    
+    return _render_totp_qr(user, secret_digest)
+
+@auth_bp.route('/setup-2fa/qr')
 @login_required
-def show_backup_codes():
-    """Show backup codes after 2FA setup"""
-    if 'backup_codes' not in session:
-        flash('No backup codes to display.', 'warning')
-        return redirect(url_for('profile.settings'))
+def setup_2fa_qr():
+    """Poll for the rendered 2FA setup QR code"""
+    secret = current_user.two_fa_secret
+    if current_user.two_fa_enabled or not secret:
+        return jsonify({'error': 'No 2FA setup in progress'}), 404
+    
+    secret_digest = AuthService.totp_secret_digest(secret)
+    qr_code = current_app.cache.get(AuthService.totp_qr_cache_key(current_user.id, secret_digest))
+    
+    if qr_code is None:
+        if current_app.cache.get(AuthService.totp_qr_pending_key(current_user.id, secret_digest)):
+            return jsonify({'pending': True}), 202
+        
+        # No twofa worker picked the task up in time
+        qr_code = _render_totp_qr(current_user, secret_digest)
     
-    backup_codes = session.pop('backup_codes')
-    return render_template('auth/backup_codes.html', backup_codes=backup_codes, title='Backup Codes')
+    return jsonify({'qr_code': qr_code})
 
 @auth_bp.route('/disable-2fa', methods=['POST'])
 @login_required
@@ -170,7 +213,7 @@ def disable_2fa():
 def logout():
     """User logout"""
     ip_address = request.remote_addr
-    user_agent = request.headers.get('User-Agent', '')
+    user_agent = _user_agent()
     
     result = AuthService.logout(current_user, ip_address, user_agent)
     
@@ -256,19 +299,14 @@ def register():
     form = RegisterForm()
     
     # Populate organization choices
-    organizations = Organization.query.filter_by(is_active=True).order_by(Organization.name).all()
-    form.organization_id.choices = [(0, 'Select your organization...')] + [
-        (org.id, f"{org.name} ({org.code})") for org in organizations
-    ]
+    form.organization_id.choices = [(0, 'Select your organization...')] + Organization.get_registration_choices()
     
     if form.validate_on_submit():
         try:
             # Get default role for new users (usually 'viewer' or 'analyst')
-            default_role = Role.query.filter_by(code='viewer').first()
-            if not default_role:
-                default_role = Role.query.filter_by(code='analyst').first()
+            default_role_id = Role.get_registration_role_id()
             
-            if not default_role:
+            if not default_role_id:
                 flash('System configuration error: No default role found. Please contact administrator.', 'error')
                 current_app.logger.error('No default role (viewer/analyst) found in database')
                 return render_template('auth/register.html', form=form, title='Register')
@@ -280,7 +318,7 @@ def register():
                 last_name=form.last_name.data.strip(),
                 phone=form.phone.data.strip() if form.phone.data else None,
                 organization_id=form.organization_id.data,
-                role_id=default_role.id,
+                role_id=default_role_id,
                 job_title=form.job_title.data.strip() if form.job_title.data else None,
                 department=form.department.data.strip() if form.department.data else None,
                 is_active=False,  # Requires admin approval
@@ -294,36 +332,30 @@ def register():
             db.session.add(user)
             db.session.commit()
             
+            AuditLog.log_deferred(
+                action=AuditAction.CREATE,
+                user=user,
+                resource_type='user',
+                resource_id=user.id,
+                description='User registered',
+                ip_address=request.remote_addr,
+                user_agent=_user_agent(),
+                new_values={
+                    'email': user.email,
+                    'organization_id': user.organization_id,
+                    'registration_method': 'web_form'
+                }
+            )
+            
             # Log the registration
             current_app.logger.info(f'New user registered: {user.email} (ID: {user.id})')
             
-            # Create audit log
+            # Notify admins off the request thread
             try:
-                from models import AuditLog
-                audit = AuditLog(
-                    user_id=user.id,
-                    action='user_registered',
-                    resource_type='User',
-                    resource_id=user.id,
-                    ip_address=request.remote_addr,
-                    user_agent=request.user_agent.string,
-                    details={
-                        'email': user.email,
-                        'organization_id': user.organization_id,
-                        'registration_method': 'web_form'
-                    }
-                )
-                db.session.add(audit)
-                db.session.commit()
+                from tasks.mail import notify_admins_new_user_task
+                notify_admins_new_user_task.delay(user.id)
             except Exception as e:
-                current_app.logger.warning(f'Failed to create audit log for registration: {str(e)}')
-            
-            # Send notification to admins
-            try:
-                from services import NotificationService
-                NotificationService.notify_admins_new_user_registration(user)
-            except Exception as e:
-                current_app.logger.warning(f'Failed to send admin notification: {str(e)}')
+                current_app.logger.warning(f'Failed to queue admin notification: {str(e)}')
             
             # Success message
             flash(
@@ -360,11 +392,14 @@ def approve_user(user_id):
     """
     Admin endpoint to approve pending user registrations
     """
-    if not current_user.has_permission('manage_users'):
+    # Resolve the proxy once; the handler reads the admin several times
+    admin = current_user._get_current_object()
+    
+    if not admin.has_permission('manage_users'):
         flash('You do not have permission to approve users.', 'error')
         return redirect(url_for('main.dashboard'))
     
-    user = User.query.get_or_404(user_id)
+    user = db.get_or_404(User, user_id)
     
     if user.is_active:
         flash(f'User {user.email} is already active.', 'info')
@@ -374,31 +409,30 @@ def approve_user(user_id):
         user.is_active = True
         db.session.commit()
         
-        # Create audit log
-        from models import AuditLog
-        audit = AuditLog(
-            user_id=current_user.id,
-            action='user_approved',
-            resource_type='User',
+        AuditLog.log(
+            action=AuditAction.UPDATE,
+            user=admin,
+            organization=user.organization,
+            resource_type='user',
             resource_id=user.id,
+            description=f'Approved user registration: {user.email}',
             ip_address=request.remote_addr,
-            details={
-                'approved_user_email': user.email,
-                'approved_by': current_user.email
+            old_values={'is_active': False},
+            new_values={
+                'is_active': True,
+                'approved_by': admin.email
             }
         )
-        db.session.add(audit)
-        db.session.commit()
         
-        # Send welcome email to user
+        # Send welcome email to user off the request thread
         try:
-            from services import NotificationService
-            NotificationService.send_account_activated_email(user)
+            from tasks.mail import send_account_activated_email_task
+            send_account_activated_email_task.delay(user.id)
         except Exception as e:
-            current_app.logger.warning(f'Failed to send activation email: {str(e)}')
+            current_app.logger.warning(f'Failed to queue activation email: {str(e)}')
         
         flash(f'User {user.full_name} ({user.email}) has been approved and can now log in.', 'success')
-        current_app.logger.info(f'User {user.email} approved by {current_user.email}')
+        current_app.logger.info(f'User {user.email} approved by {admin.email}')
         
     except Exception as e:
         db.session.rollback()
@@ -414,37 +448,38 @@ def reject_user(user_id):
     """
     Admin endpoint to reject pending user registrations
     """
-    if not current_user.has_permission('manage_users'):
+    # Resolve the proxy once; the handler reads the admin several times
+    admin = current_user._get_current_object()
+    
+    if not admin.has_permission('manage_users'):
         flash('You do not have permission to reject users.', 'error')
         return redirect(url_for('main.dashboard'))
     
-    user = User.query.get_or_404(user_id)
+    user = db.get_or_404(User, user_id)
     
     try:
-        # Create audit log before deletion
-        from models import AuditLog
-        audit = AuditLog(
-            user_id=current_user.id,
-            action='user_rejected',
-            resource_type='User',
-            resource_id=user.id,
-            ip_address=request.remote_addr,
-            details={
-                'rejected_user_email': user.email,
-                'rejected_by': current_user.email
-            }
-        )
-        db.session.add(audit)
-        
         user_email = user.email
         user_name = user.full_name
+        organization = user.organization
         
         # Delete the user
         db.session.delete(user)
         db.session.commit()
         
+        AuditLog.log(
+            action=AuditAction.DELETE,
+            user=admin,
+            organization=organization,
+            resource_type='user',
+            resource_id=user_id,
+            description=f'Rejected user registration: {user_email}',
+            ip_address=request.remote_addr,
+            old_values={'email': user_email},
+            new_values={'rejected_by': admin.email}
+        )
+        
         flash(f'Registration for {user_name} ({user_email}) has been rejected.', 'success')
-        current_app.logger.info(f'User registration {user_email} rejected by {current_user.email}')
+        current_app.logger.info(f'User registration {user_email} rejected by {admin.email}')
         
     except Exception as e:
         db.session.rollback()
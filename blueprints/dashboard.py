@@ -3,13 +3,15 @@ Widgets, Dashboards, API, and Profile Blueprints
 Complete route handlers for remaining functionality
 """
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, abort, send_file
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, abort, send_file, current_app
 from flask_login import login_required, current_user
 from functools import wraps
+from werkzeug.exceptions import HTTPException
+from sqlalchemy.orm import joinedload
 from models import Widget, Dashboard, DataSource, DashboardWidget, WidgetType, APIKey, db
 from forms import WidgetForm, DashboardForm, DashboardWidgetAddForm, ProfileForm
 from services import WidgetProcessor, ReportService, NotificationService
-import json
+import orjson
 
 
 def permission_required(permission_code):
@@ -83,28 +85,28 @@ def create():
             )
             
             # Parse JSON configurations
-            if form.fields.data:
-                widget.fields = json.loads(form.fields.data)
-            if form.filters.data:
-                widget.filters = json.loads(form.filters.data)
-            if form.aggregations.data:
-                widget.aggregations = json.loads(form.aggregations.data)
-            if form.sorting.data:
-                widget.sorting = json.loads(form.sorting.data)
-            if form.display_config.data:
-                widget.display_config = json.loads(form.display_config.data)
-            if form.kpi_config.data:
-                widget.kpi_config = json.loads(form.kpi_config.data)
+            json_fields = [
+                ('fields', form.fields.data),
+                ('filters', form.filters.data),
+                ('aggregations', form.aggregations.data),
+                ('sorting', form.sorting.data),
+                ('display_config', form.display_config.data),
+                ('kpi_config', form.kpi_config.data)
+            ]
+            for attr, raw in json_fields:
+                if raw:
+                    setattr(widget, attr, orjson.loads(raw))
             
             widget.limit = form.limit.data
             
             db.session.add(widget)
             db.session.commit()
+            current_app.cache.clear_dashboard_stats(current_user.organization_id)
             
             flash(f'Widget "{widget.name}" created successfully!', 'success')
             return redirect(url_for('widgets.view', id=widget.id))
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             flash(f'Invalid JSON in configuration: {str(e)}', 'danger')
         except Exception as e:
             db.session.rollback()
@@ -118,7 +120,7 @@ def create():
 @permission_required('view_widgets')
 def view(id):
     """View widget details"""
-    widget = Widget.query.get_or_404(id)
+    widget = db.session.get(Widget, id, options=[joinedload(Widget.data_source)]) or abort(404)
     
     # Check organization access
     if widget.data_source.organization_id != current_user.organization_id:
@@ -132,7 +134,7 @@ def view(id):
 @permission_required('preview_widget')
 def preview(id):
     """Preview widget with data"""
-    widget = Widget.query.get_or_404(id)
+    widget = db.session.get(Widget, id, options=[joinedload(Widget.data_source)]) or abort(404)
     
     # Check organization access
     if widget.data_source.organization_id != current_user.organization_id:
@@ -162,7 +164,7 @@ def preview(id):
 @permission_required('delete_widget')
 def delete(id):
     """Delete widget"""
-    widget = Widget.query.get_or_404(id)
+    widget = db.session.get(Widget, id, options=[joinedload(Widget.data_source)]) or abort(404)
     
     # Check organization access
     if widget.data_source.organization_id != current_user.organization_id:
@@ -172,6 +174,7 @@ def delete(id):
         widget_name = widget.name
         db.session.delete(widget)
         db.session.commit()
+        current_app.cache.clear_dashboard_stats(current_user.organization_id)
         
         flash(f'Widget "{widget_name}" deleted successfully!', 'success')
         
@@ -220,9 +223,7 @@ def create():
     
     # Populate role choices
     from models import Role, Organization
-    form.allowed_roles.choices = [
-        (r.id, r.name) for r in Role.query.filter_by(is_active=True).all()
-    ]
+    form.allowed_roles.choices = Role.get_active_choices()
     
     # Get available widgets for initial selection
     available_widgets = Widget.query.join(DataSource).filter(
@@ -269,7 +270,7 @@ def create():
             widget_ids = request.form.getlist('widget_ids')
             if widget_ids:
                 for idx, widget_id in enumerate(widget_ids):
-                    widget = Widget.query.get(int(widget_id))
+                    widget = db.session.get(Widget, int(widget_id))
                     if widget:
                         dashboard.add_widget(
                             widget=widget,
@@ -280,6 +281,7 @@ def create():
                         )
             
             db.session.commit()
+            current_app.cache.clear_dashboard_stats(current_user.organization_id)
             
             flash(f'Dashboard "{dashboard.name}" created successfully!', 'success')
             return redirect(url_for('dashboards.view', id=dashboard.id))
@@ -302,7 +304,7 @@ def create():
 @permission_required('view_dashboards')
 def view(id):
     """View dashboard"""
-    dashboard = Dashboard.query.get_or_404(id)
+    dashboard = db.get_or_404(Dashboard, id)
     
     # Check organization access
     if dashboard.organization_id != current_user.organization_id:
@@ -338,7 +340,7 @@ def view(id):
 @permission_required('edit_dashboard')
 def edit(id):
     """Edit dashboard"""
-    dashboard = Dashboard.query.get_or_404(id)
+    dashboard = db.get_or_404(Dashboard, id)
     
     # Check organization access
     if dashboard.organization_id != current_user.organization_id:
@@ -349,6 +351,7 @@ def edit(id):
         try:
             dashboard.is_active = False
             db.session.commit()
+            current_app.cache.clear_dashboard_stats(current_user.organization_id)
             flash(f'Dashboard "{dashboard.name}" archived successfully!', 'success')
             return redirect(url_for('dashboards.index'))
         except Exception as e:
@@ -369,7 +372,7 @@ def edit(id):
     
     if add_widget_form.validate_on_submit():
         try:
-            widget = Widget.query.get(add_widget_form.widget.data)
+            widget = db.session.get(Widget, add_widget_form.widget.data)
             
             dashboard.add_widget(
                 widget=widget,
@@ -397,7 +400,7 @@ def edit(id):
 @permission_required('edit_dashboard')
 def remove_widget(dashboard_id, widget_id):
     """Remove widget from dashboard"""
-    dashboard = Dashboard.query.get_or_404(dashboard_id)
+    dashboard = db.get_or_404(Dashboard, dashboard_id)
     
     # Check organization access
     if dashboard.organization_id != current_user.organization_id:
@@ -427,7 +430,7 @@ def remove_widget(dashboard_id, widget_id):
 @permission_required('export_dashboard')
 def export(id):
     """Export dashboard"""
-    dashboard = Dashboard.query.get_or_404(id)
+    dashboard = db.get_or_404(Dashboard, id)
     
     # Check organization access
     if dashboard.organization_id != current_user.organization_id:
@@ -465,7 +468,7 @@ def export(id):
 @permission_required('delete_dashboard')
 def delete(id):
     """Delete dashboard"""
-    dashboard = Dashboard.query.get_or_404(id)
+    dashboard = db.get_or_404(Dashboard, id)
     
     # Check organization access
     if dashboard.organization_id != current_user.organization_id:
@@ -475,6 +478,7 @@ def delete(id):
         dashboard_name = dashboard.name
         db.session.delete(dashboard)
         db.session.commit()
+        current_app.cache.clear_dashboard_stats(current_user.organization_id)
         
         flash(f'Dashboard "{dashboard_name}" deleted successfully!', 'success')
         
@@ -496,32 +500,25 @@ api_bp = Blueprint('api', __name__)
 @login_required
 def widget_data(id):
     """Get widget data (API endpoint)"""
-    widget = Widget.query.get_or_404(id)
+    widget = db.session.get(Widget, id, options=[joinedload(Widget.data_source)]) or abort(404)
     
     # Check organization access
     if widget.data_source.organization_id != current_user.organization_id:
         return jsonify({'error': 'Unauthorized'}), 403
     
-    try:
-        result = WidgetProcessor.process_widget(widget)
-        
-        if result['success']:
-            return jsonify({
-                'success': True,
-                'widget': result['widget'],
-                'data': result['data'],
-                'from_cache': result.get('from_cache', False)
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'error': result.get('error')
-            }), 500
-            
-    except Exception as e:
+    result = WidgetProcessor.process_widget(widget)
+    
+    if result['success']:
+        return jsonify({
+            'success': True,
+            'widget': widget.to_dict(include_config=True),
+            'data': result['data'],
+            'from_cache': result.get('from_cache', False)
+        })
+    else:
         return jsonify({
             'success': False,
-            'error': str(e)
+            'error': result.get('error')
         }), 500
 
 
@@ -529,42 +526,50 @@ def widget_data(id):
 @login_required
 def dashboard_data(id):
     """Get all dashboard widgets data (API endpoint)"""
-    dashboard = Dashboard.query.get_or_404(id)
+    dashboard = db.get_or_404(Dashboard, id)
     
     # Check organization access
     if dashboard.organization_id != current_user.organization_id:
         return jsonify({'error': 'Unauthorized'}), 403
     
-    try:
-        widgets_data = {}
-        
-        for dw in dashboard.dashboard_widgets:
-            result = WidgetProcessor.process_widget(dw.widget)
-            if result['success']:
-                widgets_data[dw.widget.id] = {
-                    'widget': result['widget'],
-                    'data': result['data'],
-                    'position': {
-                        'x': dw.position_x,
-                        'y': dw.position_y,
-                        'width': dw.width,
-                        'height': dw.height
-                    }
+    widgets_data = {}
+    
+    for dw in dashboard.dashboard_widgets:
+        result = WidgetProcessor.process_widget(dw.widget)
+        if result['success']:
+            widgets_data[dw.widget.id] = {
+                'widget': dw.widget.to_dict(include_config=True),
+                'data': result['data'],
+                'position': {
+                    'x': dw.position_x,
+                    'y': dw.position_y,
+                    'width': dw.width,
+                    'height': dw.height
                 }
-        
-        return jsonify({
-            'success': True,
-            'dashboard': dashboard.to_dict(),
-            'widgets': widgets_data
-        })
-        
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+            }
     
-    # ============================================================================
+    return jsonify({
+        'success': True,
+        'dashboard': dashboard.to_dict(),
+        'widgets': widgets_data
+    })
+
+
+@api_bp.errorhandler(Exception)
+def api_error(error):
+    """Return unexpected API failures in the standard JSON envelope"""
+    if isinstance(error, HTTPException):
+        return error
+    
+    db.session.rollback()
+    current_app.logger.exception('API request failed')
+    return jsonify({
+        'success': False,
+        'error': str(error)
+    }), 500
+
+
+# ============================================================================
 # PROFILE BLUEPRINT
 # ============================================================================
 
@@ -659,7 +664,7 @@ def create_api_key():
 @login_required
 def delete_api_key(id):
     """Delete API key"""
-    api_key = APIKey.query.get_or_404(id)
+    api_key = db.get_or_404(APIKey, id)
     
     # Check organization access
     if api_key.organization_id != current_user.organization_id:
@@ -134,6 +134,7 @@ def create_api():
             
             db.session.add(ds)
             db.session.commit()
+            current_app.cache.clear_dashboard_stats(current_user.organization_id)
             
             # Test connection and infer schema
             test_result = DataFetcher.test_connection(ds)
@@ -230,6 +231,7 @@ def create_upload():
             
             db.session.add(ds)
             db.session.commit()
+            current_app.cache.clear_dashboard_stats(current_user.organization_id)
             
             # Fetch data and infer schema
             fetch_result = DataFetcher.fetch_data(ds, force_refresh=True)
@@ -319,6 +321,7 @@ def create_link():
             
             db.session.add(ds)
             db.session.commit()
+            current_app.cache.clear_dashboard_stats(current_user.organization_id)
             
             # Test connection
             test_result = DataFetcher.test_connection(ds)
@@ -382,6 +385,7 @@ def create_database():
             
             db.session.add(ds)
             db.session.commit()
+            current_app.cache.clear_dashboard_stats(current_user.organization_id)
             
             # Test connection
             test_result = DataFetcher.test_connection(ds)
@@ -406,7 +410,7 @@ def create_database():
 @permission_required('view_data_sources')
 def view(id):
     """View data source details with schema and health"""
-    ds = DataSource.query.get_or_404(id)
+    ds = db.get_or_404(DataSource, id)
     
     if ds.organization_id != current_user.organization_id:
         abort(403)
@@ -433,7 +437,7 @@ def view(id):
 @permission_required('edit_data_source')
 def edit(id):
     """Edit data source"""
-    ds = DataSource.query.get_or_404(id)
+    ds = db.get_or_404(DataSource, id)
     
     if ds.organization_id != current_user.organization_id:
         abort(403)
@@ -483,6 +487,7 @@ def edit(id):
                     ds.auth_password = form.auth_password.data
             
             db.session.commit()
+            current_app.cache.clear_dashboard_stats(current_user.organization_id)
             flash(f'Data source "{ds.name}" updated successfully!', 'success')
             return redirect(url_for('data_sources.view', id=ds.id))
             
@@ -499,14 +504,15 @@ def edit(id):
 @permission_required('delete_data_source')
 def delete(id):
     """Soft delete data source"""
-    ds = DataSource.query.get_or_404(id)
+    ds = db.get_or_404(DataSource, id)
     
     if ds.organization_id != current_user.organization_id:
         abort(403)
     
-    widget_count = ds.widgets.filter_by(is_active=True).count()
-    if widget_count > 0:
-        flash(f'Cannot delete. {widget_count} active widgets are using it.', 'danger')
+    # EXISTS stops at the first match; only count when reporting the refusal
+    active_widgets = ds.widgets.filter_by(is_active=True)
+    if db.session.query(active_widgets.exists()).scalar():
+        flash(f'Cannot delete. {active_widgets.count()} active widgets are using it.', 'danger')
         return redirect(url_for('data_sources.view', id=id))
     
     try:
@@ -514,6 +520,7 @@ def delete(id):
         ds.deleted_at = datetime.utcnow()
         ds.is_active = False
         db.session.commit()
+        current_app.cache.clear_dashboard_stats(current_user.organization_id)
         
         flash(f'Data source "{ds.name}" deleted successfully!', 'success')
     except Exception as e:
@@ -528,7 +535,7 @@ def delete(id):
 @permission_required('test_data_source')
 def test_connection(id):
     """Test data source connection"""
-    ds = DataSource.query.get_or_404(id)
+    ds = db.get_or_404(DataSource, id)
     
     if ds.organization_id != current_user.organization_id:
         return jsonify({'success': False, 'message': 'Unauthorized'}), 403
@@ -545,7 +552,7 @@ def test_connection(id):
 @permission_required('refresh_data_source')
 def refresh(id):
     """Manually refresh data source (background job)"""
-    ds = DataSource.query.get_or_404(id)
+    ds = db.get_or_404(DataSource, id)
     
     if ds.organization_id != current_user.organization_id:
         abort(403)
@@ -578,7 +585,7 @@ def refresh(id):
 @permission_required('view_data_sources')
 def view_schema(id):
     """View data source schema"""
-    ds = DataSource.query.get_or_404(id)
+    ds = db.get_or_404(DataSource, id)
     
     if ds.organization_id != current_user.organization_id:
         abort(403)
@@ -591,7 +598,7 @@ def view_schema(id):
 @permission_required('edit_data_source')
 def infer_schema(id):
     """Manually trigger schema inference"""
-    ds = DataSource.query.get_or_404(id)
+    ds = db.get_or_404(DataSource, id)
     
     if ds.organization_id != current_user.organization_id:
         return jsonify({'success': False, 'message': 'Unauthorized'}), 403
@@ -621,7 +628,7 @@ def infer_schema(id):
 @login_required
 def health_status(id):
     """Get real-time health status"""
-    ds = DataSource.query.get_or_404(id)
+    ds = db.get_or_404(DataSource, id)
     
     if ds.organization_id != current_user.organization_id:
         return jsonify({'success': False, 'message': 'Unauthorized'}), 403
@@ -643,7 +650,7 @@ def health_status(id):
 @permission_required('view_data_sources')
 def preview_data(id):
     """Preview data with schema"""
-    ds = DataSource.query.get_or_404(id)
+    ds = db.get_or_404(DataSource, id)
     
     if ds.organization_id != current_user.organization_id:
         abort(403)
@@ -12,12 +12,44 @@ class Config:
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
     
+    # Password hashing cost (argon2id; memory in KiB)
+    ARGON2_TIME_COST = int(os.environ.get('ARGON2_TIME_COST', 3))
+    ARGON2_MEMORY_COST = int(os.environ.get('ARGON2_MEMORY_COST', 61440))
+    ARGON2_PARALLELISM = int(os.environ.get('ARGON2_PARALLELISM', 2))
+    
     # WTF
     WTF_CSRF_ENABLED = True
     WTF_CSRF_TIME_LIMIT = None
 
     REDIS_URL = os.environ.get('REDIS_URL')
     
+    # Seconds browsers may cache CORS preflight results for /api/*
+    CORS_MAX_AGE = int(os.environ.get('CORS_MAX_AGE', 86400))
+    
+    # Gzip JSON responses at least this many bytes long (0 disables)
+    JSON_COMPRESS_MIN_SIZE = int(os.environ.get('JSON_COMPRESS_MIN_SIZE', 1024))
+    
+    # Seconds to cache each user's unread notification count
+    UNREAD_COUNT_TTL = int(os.environ.get('UNREAD_COUNT_TTL', 60))
+    
+    # Seconds to cache each organization's main dashboard stats
+    DASHBOARD_STATS_TTL = int(os.environ.get('DASHBOARD_STATS_TTL', 60))
+    
+    # Seconds to cache each role's permission codes for permission checks
+    PERMISSION_CACHE_TTL = int(os.environ.get('PERMISSION_CACHE_TTL', 120))
+    
+    # Rows per page in the admin user and audit log listings
+    ADMIN_PAGE_SIZE = int(os.environ.get('ADMIN_PAGE_SIZE', 50))
+    
+    # Seconds to cache the active role/organization select choices
+    CHOICES_CACHE_TTL = int(os.environ.get('CHOICES_CACHE_TTL', 300))
+    
+    # Seconds to keep a rendered 2FA setup QR code
+    TWOFA_QR_TTL = int(os.environ.get('TWOFA_QR_TTL', 600))
+    
+    # Seconds the setup page waits for a twofa worker before rendering the QR inline
+    TWOFA_QR_RENDER_TIMEOUT = int(os.environ.get('TWOFA_QR_RENDER_TIMEOUT', 5))
+    
     # Upload
     MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 16777216))
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'uploads')
@@ -41,6 +73,15 @@ class ProductionConfig(Config):
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     
+    # Per-worker connection pool, sized for the gunicorn thread count
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True
+    }
+    
     # Enhanced security for production
     SESSION_COOKIE_SECURE = True
     PREFERRED_URL_SCHEME = 'https'
@@ -50,6 +91,11 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///test.db'
     WTF_CSRF_ENABLED = False
+    
+    # Cheap hashes keep user fixtures fast
+    ARGON2_TIME_COST = 1
+    ARGON2_MEMORY_COST = 8
+    ARGON2_PARALLELISM = 1
 
 config = {
     'development': DevelopmentConfig,
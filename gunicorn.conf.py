@@ -0,0 +1,39 @@
+"""
+Gunicorn configuration
+Usage: gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import multiprocessing
+import os
+
+# Server socket
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+
+# Workers: the app is mostly I/O bound (database, Redis, upstream APIs);
+# gthread workers let one process overlap several in-flight dashboard polls
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+keepalive = 5
+
+# Build the app once in the master so workers share imported code copy-on-write
+preload_app = True
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = 100
+
+# Logging
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master process"""
+    from wsgi import app
+    from models import db
+    
+    with app.app_context():
+        db.engine.dispose(close=False)
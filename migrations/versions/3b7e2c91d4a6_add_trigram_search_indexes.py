@@ -0,0 +1,53 @@
+"""Add trigram search indexes
+
+Revision ID: 3b7e2c91d4a6
+Revises: f9d8a5ae450a
+Create Date: 2026-10-15 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7e2c91d4a6'
+down_revision = 'f9d8a5ae450a'
+branch_labels = None
+depends_on = None
+
+
+# Columns searched with ILIKE '%term%' (main.search and admin.users)
+TRIGRAM_INDEXES = (
+    ('dashboards_name_trgm', 'dashboards', 'name'),
+    ('widgets_name_trgm', 'widgets', 'name'),
+    ('data_sources_name_trgm', 'data_sources', 'name'),
+    ('users_email_trgm', 'users', 'email'),
+    ('users_first_name_trgm', 'users', 'first_name'),
+    ('users_last_name_trgm', 'users', 'last_name'),
+)
+
+
+def upgrade():
+    # pg_trgm GIN indexes are PostgreSQL-only; other backends keep seq scans
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    for name, table, column in TRIGRAM_INDEXES:
+        op.create_index(
+            name,
+            table,
+            [column],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'}
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for name, table, column in TRIGRAM_INDEXES:
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,33 @@
+"""Add active organization name index
+
+Revision ID: a7d3e9c1b4f8
+Revises: f4c8d2b6a175
+Create Date: 2026-10-15 23:20:12.318604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e9c1b4f8'
+down_revision = 'f4c8d2b6a175'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Covers Organization.get_registration_choices: active rows in name order, id/code read from the index
+    op.create_index(
+        'ix_organizations_name_active',
+        'organizations',
+        ['name'],
+        unique=False,
+        postgresql_where=sa.text('is_active'),
+        postgresql_include=['id', 'code'],
+        sqlite_where=sa.text('is_active')
+    )
+
+
+def downgrade():
+    op.drop_index('ix_organizations_name_active', table_name='organizations')
@@ -0,0 +1,40 @@
+"""Add active listing created_at indexes
+
+Revision ID: b2e8f4a6c0d7
+Revises: a7d3e9c1b4f8
+Create Date: 2026-10-15 23:31:47.902215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2e8f4a6c0d7'
+down_revision = 'a7d3e9c1b4f8'
+branch_labels = None
+depends_on = None
+
+
+# Newest-first widget and dashboard listings only show active rows
+PARTIAL_INDEXES = (
+    ('ix_widgets_created_at_active', 'widgets', [sa.text('created_at DESC')]),
+    ('ix_dashboards_org_created_at_active', 'dashboards', ['organization_id', sa.text('created_at DESC')]),
+)
+
+
+def upgrade():
+    for name, table, columns in PARTIAL_INDEXES:
+        op.create_index(
+            name,
+            table,
+            columns,
+            unique=False,
+            postgresql_where=sa.text('is_active'),
+            sqlite_where=sa.text('is_active')
+        )
+
+
+def downgrade():
+    for name, table, columns in PARTIAL_INDEXES:
+        op.drop_index(name, table_name=table)
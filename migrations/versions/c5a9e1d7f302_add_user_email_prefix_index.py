@@ -0,0 +1,39 @@
+"""Add user email prefix index
+
+Revision ID: c5a9e1d7f302
+Revises: 8d41f0a3c5e2
+Create Date: 2026-10-15 10:47:55.106733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a9e1d7f302'
+down_revision = '8d41f0a3c5e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Operator classes are PostgreSQL-only
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # The default btree on email follows the database collation and cannot
+    # serve LIKE 'prefix%' outside the C locale; text_pattern_ops can
+    op.create_index(
+        'users_email_tpo',
+        'users',
+        ['email'],
+        unique=False,
+        postgresql_ops={'email': 'text_pattern_ops'}
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('users_email_tpo', table_name='users')
@@ -0,0 +1,38 @@
+"""Clear inactive two-factor secrets
+
+Revision ID: d8c3f1a9e6b2
+Revises: b2e8f4a6c0d7
+Create Date: 2026-10-15 23:42:10.318774
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8c3f1a9e6b2'
+down_revision = 'b2e8f4a6c0d7'
+branch_labels = None
+depends_on = None
+
+
+users = sa.table(
+    'users',
+    sa.column('two_fa_enabled', sa.Boolean),
+    sa.column('two_fa_secret', sa.String(32)),
+)
+
+
+def upgrade():
+    # 2FA setup reuses a stored secret, so users who disabled 2FA before
+    # disable_2fa cleared it must not get their old secret back
+    op.execute(
+        users.update()
+        .where(sa.or_(users.c.two_fa_enabled.is_(None), users.c.two_fa_enabled == sa.false()))
+        .values(two_fa_secret=None)
+    )
+
+
+def downgrade():
+    # Cleared secrets cannot be restored
+    pass
@@ -0,0 +1,42 @@
+"""Add active-row partial indexes
+
+Revision ID: f4c8d2b6a175
+Revises: e2f6b8a4d913
+Create Date: 2026-10-15 12:08:31.660482
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c8d2b6a175'
+down_revision = 'e2f6b8a4d913'
+branch_labels = None
+depends_on = None
+
+
+# Listings and stats only ever read active rows, so index just those
+PARTIAL_INDEXES = (
+    ('ix_dashboards_org_last_viewed_active', 'dashboards', ['organization_id', 'last_viewed']),
+    ('ix_widgets_data_source_active', 'widgets', ['data_source_id']),
+    ('ix_data_sources_org_active', 'data_sources', ['organization_id']),
+    ('ix_users_org_created_at_active', 'users', ['organization_id', 'created_at']),
+)
+
+
+def upgrade():
+    for name, table, columns in PARTIAL_INDEXES:
+        op.create_index(
+            name,
+            table,
+            columns,
+            unique=False,
+            postgresql_where=sa.text('is_active'),
+            sqlite_where=sa.text('is_active')
+        )
+
+
+def downgrade():
+    for name, table, columns in PARTIAL_INDEXES:
+        op.drop_index(name, table_name=table)
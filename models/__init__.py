@@ -3,9 +3,31 @@ Database Models Package
 Centralized model definitions
 """
 
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
 db = SQLAlchemy()
 
+
+def clear_cache_on_commit(target, *keys):
+    """Delete cache keys once the transaction changing target commits, so a
+    read between flush and commit can't re-cache the old rows"""
+    session = object_session(target) or db.session
+    session.info.setdefault('stale_cache_keys', set()).update(keys)
+
+
+@event.listens_for(Session, 'after_commit')
+def delete_stale_cache_keys(session):
+    for key in session.info.pop('stale_cache_keys', ()):
+        current_app.cache.delete(key)
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_stale_cache_keys(session):
+    session.info.pop('stale_cache_keys', None)
+
+
 # ---- Core models (NO services, NO app, NO current_app) ----
 from .organization import Organization
 from .permission import Permission, Role, role_permissions
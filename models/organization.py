@@ -4,8 +4,9 @@ Represents transport agencies (KPA, KRC, KAA, etc.)
 """
 
 from datetime import datetime
+from flask import current_app
 from sqlalchemy import event
-from . import db
+from . import db, clear_cache_on_commit
 
 
 class Organization(db.Model):
@@ -67,7 +68,7 @@ class Organization(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    users = db.relationship('User', backref='organization', lazy='dynamic', cascade='all, delete-orphan')
+    users = db.relationship('User', back_populates='organization', lazy='dynamic', cascade='all, delete-orphan')
     data_sources = db.relationship('DataSource', backref='organization', lazy='dynamic', cascade='all, delete-orphan')
     dashboards = db.relationship('Dashboard', backref='organization', lazy='dynamic', cascade='all, delete-orphan')
     api_keys = db.relationship('APIKey', backref='organization', lazy='dynamic', cascade='all, delete-orphan')
@@ -130,6 +131,34 @@ class Organization(db.Model):
         self.features_enabled[feature_name] = False
         db.session.commit()
     
+    @classmethod
+    def get_active_choices(cls):
+        """Get (id, name) pairs of active organizations for select fields, cached briefly"""
+        choices = current_app.cache.get_or_set(
+            'choices:organizations',
+            lambda: [
+                list(row) for row in db.session.execute(
+                    db.select(cls.id, cls.name).where(cls.is_active == True).order_by(cls.id)
+                )
+            ],
+            ttl=current_app.config.get('CHOICES_CACHE_TTL', 300)
+        )
+        return [tuple(choice) for choice in choices]
+    
+    @classmethod
+    def get_registration_choices(cls):
+        """Get (id, "name (code)") pairs of active organizations for the public register form, cached briefly"""
+        choices = current_app.cache.get_or_set(
+            'choices:registration_organizations',
+            lambda: [
+                [org_id, f"{name} ({code})"] for org_id, name, code in db.session.execute(
+                    db.select(cls.id, cls.name, cls.code).where(cls.is_active == True).order_by(cls.name)
+                )
+            ],
+            ttl=current_app.config.get('CHOICES_CACHE_TTL', 300)
+        )
+        return [tuple(choice) for choice in choices]
+    
     def to_dict(self, include_relationships=False):
         """Convert organization to dictionary"""
         data = {
@@ -170,4 +199,12 @@ def create_default_dashboard(mapper, connection, target):
 @event.listens_for(Organization, 'before_update')
 def update_timestamp(mapper, connection, target):
     """Update timestamp on modification"""
-    target.updated_at = datetime.utcnow()
\ No newline at end of file
+    target.updated_at = datetime.utcnow()
+
+
+@event.listens_for(Organization, 'after_insert')
+@event.listens_for(Organization, 'after_update')
+@event.listens_for(Organization, 'after_delete')
+def clear_organization_choices_cache(mapper, connection, target):
+    """Drop the cached organization choices when any organization changes"""
+    clear_cache_on_commit(target, 'choices:organizations', 'choices:registration_organizations')
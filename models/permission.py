@@ -4,8 +4,9 @@ Implements Role-Based Access Control (RBAC)
 """
 
 from datetime import datetime
+from flask import current_app
 from sqlalchemy import event
-from . import db
+from . import db, clear_cache_on_commit
 
 
 # Many-to-Many relationship table
@@ -194,6 +195,34 @@ class Role(db.Model):
         """Get all system roles"""
         return cls.query.filter_by(is_system_role=True, is_active=True).all()
     
+    @classmethod
+    def get_active_choices(cls):
+        """Get (id, name) pairs of active roles for select fields, cached briefly"""
+        choices = current_app.cache.get_or_set(
+            'choices:roles',
+            lambda: [
+                list(row) for row in db.session.execute(
+                    db.select(cls.id, cls.name).where(cls.is_active == True).order_by(cls.id)
+                )
+            ],
+            ttl=current_app.config.get('CHOICES_CACHE_TTL', 300)
+        )
+        return [tuple(choice) for choice in choices]
+    
+    @classmethod
+    def get_registration_role_id(cls):
+        """Get the id of the role self-registered users start with (viewer, else analyst), cached briefly"""
+        return current_app.cache.get_or_set(
+            'role:registration_default',
+            lambda: db.session.execute(
+                db.select(cls.id)
+                .where(cls.code.in_(('viewer', 'analyst')))
+                .order_by(db.case((cls.code == 'viewer', 0), else_=1))
+                .limit(1)
+            ).scalar(),
+            ttl=current_app.config.get('CHOICES_CACHE_TTL', 300)
+        )
+    
     def to_dict(self, include_permissions=False):
         """Convert role to dictionary"""
         data = {
@@ -237,6 +266,22 @@ def update_role_timestamp(mapper, connection, target):
     target.updated_at = datetime.utcnow()
 
 
+@event.listens_for(Role.permissions, 'append')
+@event.listens_for(Role.permissions, 'remove')
+def clear_role_permission_cache(target, value, initiator):
+    """Drop the cached permission codes when a role's permissions change"""
+    if target.id is not None:
+        clear_cache_on_commit(target, f'role:{target.id}:permissions')
+
+
+@event.listens_for(Role, 'after_insert')
+@event.listens_for(Role, 'after_update')
+@event.listens_for(Role, 'after_delete')
+def clear_role_choices_cache(mapper, connection, target):
+    """Drop the cached role choices when any role changes"""
+    clear_cache_on_commit(target, 'choices:roles', 'role:registration_default')
+
+
 @event.listens_for(Role, 'before_delete')
 def prevent_system_role_deletion(mapper, connection, target):
     """Prevent deletion of system roles"""
@@ -305,25 +350,31 @@ def create_default_permissions():
         ('manage_api_keys', 'Manage API Keys', 'system', 'Manage API access keys'),
     ]
     
-    for code, name, category, description in default_permissions:
-        if not Permission.query.filter_by(code=code).first():
-            permission = Permission(
-                code=code,
-                name=name,
-                category=category,
-                description=description,
-                is_system=True
-            )
-            db.session.add(permission)
+    # One lookup for every existing code, then a single bulk INSERT
+    existing = {code for (code,) in db.session.query(Permission.code).all()}
+    db.session.bulk_insert_mappings(Permission, [
+        {
+            'code': code,
+            'name': name,
+            'category': category,
+            'description': description,
+            'is_system': True
+        }
+        for code, name, category, description in default_permissions
+        if code not in existing
+    ])
     
     db.session.commit()
 
 
 def create_default_roles():
     """Create default roles for the system"""
+    # Fetch existing role codes and all permissions once up front
+    existing = {code for (code,) in db.session.query(Role.code).all()}
+    all_permissions = Permission.query.all()
+    
     # Super Admin - Full access
-    super_admin = Role.query.filter_by(code='super_admin').first()
-    if not super_admin:
+    if 'super_admin' not in existing:
         super_admin = Role(
             name='Super Administrator',
             code='super_admin',
@@ -333,12 +384,11 @@ def create_default_roles():
             color='#f44336',
             icon='fa-crown'
         )
-        super_admin.permissions = Permission.query.all()
+        super_admin.permissions = list(all_permissions)
         db.session.add(super_admin)
     
     # Organization Admin
-    org_admin = Role.query.filter_by(code='org_admin').first()
-    if not org_admin:
+    if 'org_admin' not in existing:
         org_admin = Role(
             name='Organization Administrator',
             code='org_admin',
@@ -349,14 +399,12 @@ def create_default_roles():
             icon='fa-user-shield'
         )
         # Add most permissions except system administration
-        org_admin.permissions = Permission.query.filter(
-            Permission.category.in_(['organization', 'user', 'role', 'data_source', 'widget', 'dashboard'])
-        ).all()
+        org_categories = {'organization', 'user', 'role', 'data_source', 'widget', 'dashboard'}
+        org_admin.permissions = [p for p in all_permissions if p.category in org_categories]
         db.session.add(org_admin)
     
     # Analyst
-    analyst = Role.query.filter_by(code='analyst').first()
-    if not analyst:
+    if 'analyst' not in existing:
         analyst = Role(
             name='Data Analyst',
             code='analyst',
@@ -367,17 +415,15 @@ def create_default_roles():
             color='#2196f3',
             icon='fa-chart-line'
         )
-        analyst.permissions = Permission.query.filter(
-            Permission.code.in_([
-                'view_data_sources', 'view_widgets', 'create_widget', 'edit_widget',
-                'view_dashboards', 'create_dashboard', 'edit_dashboard', 'export_dashboard'
-            ])
-        ).all()
+        analyst_codes = {
+            'view_data_sources', 'view_widgets', 'create_widget', 'edit_widget',
+            'view_dashboards', 'create_dashboard', 'edit_dashboard', 'export_dashboard'
+        }
+        analyst.permissions = [p for p in all_permissions if p.code in analyst_codes]
         db.session.add(analyst)
     
     # Viewer
-    viewer = Role.query.filter_by(code='viewer').first()
-    if not viewer:
+    if 'viewer' not in existing:
         viewer = Role(
             name='Viewer',
             code='viewer',
@@ -387,9 +433,7 @@ def create_default_roles():
             color='#4caf50',
             icon='fa-eye'
         )
-        viewer.permissions = Permission.query.filter(
-            Permission.code.in_(['view_dashboards', 'view_widgets'])
-        ).all()
+        viewer.permissions = [p for p in all_permissions if p.code in ('view_dashboards', 'view_widgets')]
         db.session.add(viewer)
     
     db.session.commit()
\ No newline at end of file
@@ -5,10 +5,15 @@ Supporting Models: Audit Logs, Notifications, API Keys, Data Refresh Logs
 from datetime import datetime, timedelta
 import enum
 import secrets
+from flask import current_app
 from sqlalchemy import event
 from . import db
 
 
+# Redis list drained by tasks.flush_audit_logs
+AUDIT_LOG_QUEUE = 'audit_log:queue'
+
+
 # ============================================================================
 # AUDIT LOG MODEL
 # ============================================================================
@@ -49,6 +54,10 @@ class AuditLog(db.Model):
     Comprehensive logging for security and compliance
     """
     __tablename__ = 'audit_logs'
+    __table_args__ = (
+        # Newest-first keyset pagination in the admin audit log
+        db.Index('ix_audit_logs_created_at_id', 'created_at', 'id'),
+    )
     
     # Primary Key
     id = db.Column(db.Integer, primary_key=True)
@@ -107,6 +116,39 @@ class AuditLog(db.Model):
         db.session.commit()
         return log
     
+    @classmethod
+    def log_deferred(cls, action, user=None, organization=None, **fields):
+        """
+        Queue an audit log entry for the batched flush task
+        
+        Use only for informational events such as self-registration.
+        Security events (logins, account approval and rejection, user,
+        role, organization and permission changes) must use log() so they
+        are written inside the request: queued entries live in a plain
+        Redis list and are lost if Redis drops them before the flush.
+        Falls back to an inline write when the queue is unavailable.
+        
+        Args:
+            action: AuditAction or its value
+            user: Acting user
+            organization: Organization, defaults to the user's
+            **fields: Any other log() keyword arguments
+        """
+        if not isinstance(action, AuditAction):
+            action = AuditAction(action)
+        
+        entry = {
+            'status': 'success',
+            **fields,
+            'action': action.name,
+            'user_id': user.id if user else None,
+            'organization_id': organization.id if organization else (user.organization_id if user else None),
+            'created_at': datetime.utcnow().isoformat()
+        }
+        
+        if not current_app.cache.enqueue(AUDIT_LOG_QUEUE, entry):
+            cls.log(action, user=user, organization=organization, **fields)
+    
     def to_dict(self):
         """Convert to dictionary"""
         return {
@@ -4,8 +4,11 @@ Handles user authentication, 2FA, and profile management
 """
 
 from datetime import datetime, timedelta
+from flask import current_app
 from flask_login import UserMixin
-from flask_bcrypt import generate_password_hash, check_password_hash
+from flask_bcrypt import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 import pyotp
 import secrets
 from sqlalchemy import event
@@ -13,6 +16,17 @@ from models.support import Notification
 from . import db
 
 
+
+def _password_hasher():
+    """Build the argon2id hasher from the configured cost parameters"""
+    return PasswordHasher(
+        time_cost=current_app.config.get('ARGON2_TIME_COST', 3),
+        memory_cost=current_app.config.get('ARGON2_MEMORY_COST', 61440),
+        parallelism=current_app.config.get('ARGON2_PARALLELISM', 2),
+        hash_len=16
+    )
+
+
 class User(UserMixin, db.Model):
     """
     User model with comprehensive authentication and profile features
@@ -82,6 +96,7 @@ class User(UserMixin, db.Model):
     created_by_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     
     # Relationships
+    organization = db.relationship('Organization', back_populates='users')
     role = db.relationship('Role', backref='users', foreign_keys=[role_id])
     created_by = db.relationship('User', remote_side=[id], foreign_keys=[created_by_id])
     data_sources_created = db.relationship('DataSource', backref='creator', foreign_keys='DataSource.created_by_id')
@@ -96,17 +111,27 @@ class User(UserMixin, db.Model):
     # Password Management
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = generate_password_hash(password).decode('utf-8')
+        self.password_hash = _password_hasher().hash(password)
         self.password_changed_at = datetime.utcnow()
         self.failed_login_attempts = 0
         self.locked_until = None
     
     def check_password(self, password):
-        """Verify password"""
+        """Verify password, upgrading legacy bcrypt or outdated argon2 hashes on success"""
         if self.is_locked():
             return False
         
-        is_valid = check_password_hash(self.password_hash, password)
+        hasher = _password_hasher()
+        
+        if self.password_hash.startswith('$argon2'):
+            try:
+                is_valid = hasher.verify(self.password_hash, password)
+            except (VerificationError, InvalidHashError):
+                is_valid = False
+            needs_rehash = is_valid and hasher.check_needs_rehash(self.password_hash)
+        else:
+            is_valid = check_password_hash(self.password_hash, password)
+            needs_rehash = is_valid
         
         if not is_valid:
             self.failed_login_attempts += 1
@@ -116,6 +141,9 @@ class User(UserMixin, db.Model):
         else:
             self.failed_login_attempts = 0
             self.locked_until = None
+            # Persisted by the caller's commit (record_login on sign-in)
+            if needs_rehash:
+                self.password_hash = hasher.hash(password)
         
         return is_valid
     
@@ -185,6 +213,7 @@ class User(UserMixin, db.Model):
     def disable_2fa(self):
         """Disable 2FA"""
         self.two_fa_enabled = False
+        self.two_fa_secret = None
         self.backup_codes = None
         db.session.commit()
     
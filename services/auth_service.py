@@ -7,6 +7,7 @@ from flask_login import login_user, logout_user
 
 from models import db
 from models.user import User
+from models.permission import Permission, role_permissions
 from models.support import (
     AuditLog,
     AuditAction,
@@ -16,6 +17,10 @@ from models.support import (
 
 from .notification_service import NotificationService
 from datetime import datetime
+import base64
+import hashlib
+import io
+import qrcode
 
 class AuthService:
     """
@@ -156,7 +161,7 @@ class AuthService:
                     'message': 'Invalid session. Please login again.'
                 }
             
-            user = User.query.get(user_id)
+            user = db.session.get(User, user_id)
             if not user:
                 return {
                     'success': False,
@@ -338,6 +343,67 @@ class AuthService:
                 'message': 'An error occurred while enabling 2FA'
             }
     
+    @staticmethod
+    def totp_secret_digest(secret):
+        """
+        Short digest identifying a TOTP secret without revealing it
+        
+        Args:
+            secret: TOTP secret
+            
+        Returns:
+            str: First 16 hex characters of the secret's SHA-256
+        """
+        return hashlib.sha256(secret.encode()).hexdigest()[:16]
+    
+    @staticmethod
+    def totp_qr_cache_key(user_id, secret_digest):
+        """
+        Cache key for a user's rendered 2FA QR code
+        
+        Args:
+            user_id: User ID
+            secret_digest: totp_secret_digest() of the secret the QR code encodes
+            
+        Returns:
+            str: Redis key, so a regenerated secret never serves a stale QR
+        """
+        return f'2fa_qr:{user_id}:{secret_digest}'
+    
+    @staticmethod
+    def totp_qr_pending_key(user_id, secret_digest):
+        """
+        Cache key marking a queued QR render that has not timed out yet
+        
+        Args:
+            user_id: User ID
+            secret_digest: totp_secret_digest() of the secret being rendered
+            
+        Returns:
+            str: Redis key
+        """
+        return f'2fa_qr:pending:{user_id}:{secret_digest}'
+    
+    @staticmethod
+    def render_totp_qr(uri):
+        """
+        Render a TOTP provisioning URI as a base64 PNG QR code
+        
+        Args:
+            uri: otpauth:// provisioning URI
+            
+        Returns:
+            str: Base64-encoded PNG
+        """
+        qr = qrcode.QRCode(version=1, box_size=10, border=5)
+        qr.add_data(uri)
+        qr.make(fit=True)
+        img = qr.make_image(fill_color="black", back_color="white")
+        
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG')
+        return base64.b64encode(buffer.getvalue()).decode()
+    
     @staticmethod
     def disable_2fa(user):
         """
@@ -568,7 +634,34 @@ class AuthService:
         if not user or not user.is_active:
             return False
         
-        return user.has_permission(permission_code)
+        if user.is_superuser:
+            return True
+        
+        if not user.role_id:
+            return False
+        
+        return permission_code in AuthService.get_role_permission_codes(user.role_id)
+    
+    @staticmethod
+    def get_role_permission_codes(role_id):
+        """
+        Get the permission codes granted to a role, cached per role
+        
+        Args:
+            role_id: Role ID
+            
+        Returns:
+            list: Permission codes
+        """
+        return current_app.cache.get_or_set(
+            f'role:{role_id}:permissions',
+            lambda: db.session.execute(
+                db.select(Permission.code)
+                .join(role_permissions, role_permissions.c.permission_id == Permission.id)
+                .where(role_permissions.c.role_id == role_id)
+            ).scalars().all(),
+            ttl=current_app.config.get('PERMISSION_CACHE_TTL', 120)
+        )
     
     @staticmethod
     def require_permission(user, permission_code):
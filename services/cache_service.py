@@ -8,15 +8,62 @@ from models import (
     Notification, NotificationType, User,
     Dashboard, Widget, DataSource, db
 )
-import json
+import orjson
 from io import BytesIO
 import redis
+import uuid
 import logging # Add this import at the top
 
 # Create a standard logger for this module
 logger = logging.getLogger(__name__)
 
 class CacheService:
+    # LRANGE/LTRIM plus a copy into the processing list, in one atomic step
+    _DEQUEUE_TO_PROCESSING = """
+        local values = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+        if #values > 0 then
+            redis.call('LTRIM', KEYS[1], #values, -1)
+            redis.call('RPUSH', KEYS[2], unpack(values))
+        end
+        return values
+    """
+    
+    # Move the lists of runs whose heartbeat key (list name + ARGV[1]) has
+    # expired back onto the queue; lists of live runs are left alone
+    _REQUEUE_ABANDONED = """
+        local moved = 0
+        for _, processing in ipairs(redis.call('SMEMBERS', KEYS[1])) do
+            if redis.call('EXISTS', processing .. ARGV[1]) == 0 then
+                local values = redis.call('LRANGE', processing, 0, -1)
+                if #values > 0 then
+                    redis.call('RPUSH', KEYS[2], unpack(values))
+                end
+                redis.call('DEL', processing)
+                redis.call('SREM', KEYS[1], processing)
+                moved = moved + #values
+            end
+        end
+        return moved
+    """
+    
+    # Only the holder of the token may extend or release a lock
+    _EXTEND_LOCK = """
+        if redis.call('GET', KEYS[1]) == ARGV[1] then
+            return redis.call('EXPIRE', KEYS[1], ARGV[2])
+        end
+        return 0
+    """
+    
+    _RELEASE_LOCK = """
+        if redis.call('GET', KEYS[1]) == ARGV[1] then
+            return redis.call('DEL', KEYS[1])
+        end
+        return 0
+    """
+    
+    # Suffix of the key marking a processing list's consumer as alive
+    PROCESSING_HEARTBEAT_SUFFIX = ':alive'
+    
     def __init__(self):
         self.redis_client = None
         self.enabled = False
@@ -45,7 +92,7 @@ class CacheService:
         try:
             value = self.redis_client.get(key)
             if value:
-                return json.loads(value)
+                return orjson.loads(value)
             return None
         except Exception as e:
             current_app.logger.error(f'Cache get error: {str(e)}')
@@ -64,13 +111,33 @@ class CacheService:
             return False
         
         try:
-            json_value = json.dumps(value, default=str)
+            # numpy scalars from pandas-backed widget data encode natively
+            json_value = orjson.dumps(
+                value,
+                default=str,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            )
             self.redis_client.setex(key, ttl, json_value)
             return True
         except Exception as e:
             current_app.logger.error(f'Cache set error: {str(e)}')
             return False
     
+    def get_or_set(self, key, creator, ttl=300):
+        """
+        Get value from cache, computing and caching it on a miss
+        
+        Args:
+            key: Cache key
+            creator: Callable returning the value to cache on a miss
+            ttl: Time to live in seconds (default 5 minutes)
+        """
+        value = self.get(key)
+        if value is None:
+            value = creator()
+            self.set(key, value, ttl)
+        return value
+    
     def delete(self, key):
         """Delete value from cache"""
         if not self.enabled:
@@ -97,6 +164,160 @@ class CacheService:
             current_app.logger.error(f'Cache clear pattern error: {str(e)}')
             return 0
     
+    def enqueue(self, key, value):
+        """
+        Append a value to a Redis list used as a work queue
+        
+        Args:
+            key: List key
+            value: Value to queue (will be JSON serialized)
+            
+        Returns:
+            bool: True if the value was queued
+        """
+        if not self.enabled:
+            return False
+        
+        try:
+            self.redis_client.rpush(key, orjson.dumps(value, default=str))
+            return True
+        except Exception as e:
+            current_app.logger.error(f'Cache enqueue error: {str(e)}')
+            return False
+    
+    def dequeue_batch(self, key, count, processing_key=None):
+        """
+        Atomically take up to count values from the head of a Redis list
+        
+        Args:
+            key: List key
+            count: Maximum number of values to take
+            processing_key: Optional list that receives a copy of the taken
+                values, so they survive a crash until deleted by the consumer
+            
+        Returns:
+            list: Deserialized values, oldest first
+        """
+        if not self.enabled:
+            return []
+        
+        try:
+            if processing_key:
+                values = self.redis_client.eval(
+                    self._DEQUEUE_TO_PROCESSING, 2, key, processing_key, count
+                )
+            else:
+                pipe = self.redis_client.pipeline()
+                pipe.lrange(key, 0, count - 1)
+                pipe.ltrim(key, count, -1)
+                values, _ = pipe.execute()
+            return [orjson.loads(value) for value in values]
+        except Exception as e:
+            current_app.logger.error(f'Cache dequeue error: {str(e)}')
+            return []
+    
+    def touch_processing(self, registry_key, processing_key, ttl):
+        """
+        Register a processing list and refresh its consumer's heartbeat
+        
+        Args:
+            registry_key: Set of processing lists for one queue
+            processing_key: Processing list filled by dequeue_batch
+            ttl: Seconds without a refresh before the list counts as abandoned
+        """
+        if not self.enabled:
+            return False
+        
+        try:
+            pipe = self.redis_client.pipeline()
+            pipe.sadd(registry_key, processing_key)
+            pipe.set(processing_key + self.PROCESSING_HEARTBEAT_SUFFIX, 1, ex=ttl)
+            pipe.execute()
+            return True
+        except Exception as e:
+            current_app.logger.error(f'Cache processing heartbeat error: {str(e)}')
+            return False
+    
+    def release_processing(self, processing_key):
+        """
+        Mark a processing list's consumer as done
+        
+        Anything still in the list is moved back by the next
+        requeue_abandoned call, which also unregisters it.
+        """
+        return self.delete(processing_key + self.PROCESSING_HEARTBEAT_SUFFIX)
+    
+    def requeue_abandoned(self, registry_key, key):
+        """
+        Move values left by crashed consumers back onto their queue
+        
+        Args:
+            registry_key: Set of processing lists kept by touch_processing
+            key: Queue list key
+            
+        Returns:
+            int: Number of values moved back
+        """
+        if not self.enabled:
+            return 0
+        
+        try:
+            return self.redis_client.eval(
+                self._REQUEUE_ABANDONED, 2, registry_key, key, self.PROCESSING_HEARTBEAT_SUFFIX
+            )
+        except Exception as e:
+            current_app.logger.error(f'Cache requeue error: {str(e)}')
+            return 0
+    
+    def acquire_lock(self, key, ttl):
+        """
+        Take an expiring lock owned by a random token
+        
+        Args:
+            key: Lock key
+            ttl: Seconds until the lock expires on its own
+            
+        Returns:
+            str: Token to pass to extend_lock/release_lock, None if the lock is taken
+        """
+        if not self.enabled:
+            return None
+        
+        token = uuid.uuid4().hex
+        try:
+            if self.redis_client.set(key, token, nx=True, ex=ttl):
+                return token
+        except Exception as e:
+            current_app.logger.error(f'Cache lock error: {str(e)}')
+        return None
+    
+    def extend_lock(self, key, token, ttl):
+        """
+        Reset a held lock's expiry
+        
+        Returns:
+            bool: False if the lock expired or now belongs to someone else
+        """
+        if not self.enabled:
+            return False
+        
+        try:
+            return bool(self.redis_client.eval(self._EXTEND_LOCK, 1, key, token, ttl))
+        except Exception as e:
+            current_app.logger.error(f'Cache lock error: {str(e)}')
+            return False
+    
+    def release_lock(self, key, token):
+        """Release a lock, unless it already expired and was taken by someone else"""
+        if not self.enabled:
+            return False
+        
+        try:
+            return bool(self.redis_client.eval(self._RELEASE_LOCK, 1, key, token))
+        except Exception as e:
+            current_app.logger.error(f'Cache lock error: {str(e)}')
+            return False
+    
     def get_widget_data(self, widget_id):
         """Get cached widget data"""
         return self.get(f'widget:{widget_id}:data')
@@ -121,6 +342,22 @@ class CacheService:
         """Clear dashboard cache"""
         return self.delete(f'dashboard:{dashboard_id}:data')
     
+    def clear_unread_notifications(self, user_id):
+        """Clear cached unread notification count for a user"""
+        return self.delete(f'user:{user_id}:unread_notif')
+    
+    def clear_dashboard_stats(self, organization_id):
+        """Clear cached main dashboard stats for an organization"""
+        return self.delete(f'org:{organization_id}:dashboard_stats')
+    
+    def clear_role_permissions(self, role_id):
+        """Clear cached permission codes for a role"""
+        return self.delete(f'role:{role_id}:permissions')
+    
+    def clear_form_choices(self, name):
+        """Clear a cached form choice list"""
+        return self.delete(f'choices:{name}')
+    
     def clear_organization_cache(self, organization_id):
         """Clear all caches for an organization"""
         patterns = [
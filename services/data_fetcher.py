@@ -298,7 +298,8 @@ class DataFetcher:
                 return {'success': True, 'data': data}
             
             elif data_format == DataFormat.CSV:
-                df = pd.read_csv(file_path)
+                # Parse '1,234,567' style figures as numbers while reading
+                df = pd.read_csv(file_path, thousands=',')
                 # Handle NaN values
                 df = df.where(pd.notnull(df), None)
                 data = df.to_dict('records')
@@ -310,7 +311,7 @@ class DataFetcher:
                 return {'success': True, 'data': data}
             
             elif data_format == DataFormat.EXCEL:
-                df = pd.read_excel(file_path, engine='openpyxl')
+                df = pd.read_excel(file_path, engine='openpyxl', thousands=',')
                 df = df.where(pd.notnull(df), None)
                 data = df.to_dict('records')
                 return {'success': True, 'data': data}
@@ -348,7 +349,7 @@ class DataFetcher:
             return response.json()
         
         elif data_format == DataFormat.CSV:
-            df = pd.read_csv(io.StringIO(response.text))
+            df = pd.read_csv(io.StringIO(response.text), thousands=',')
             df = df.where(pd.notnull(df), None)
             return df.to_dict('records')
         
@@ -0,0 +1,44 @@
+"""
+orjson-backed JSON provider
+Drop-in replacement for Flask's default provider used by jsonify and request.get_json
+"""
+
+from decimal import Decimal
+import orjson
+from flask.json.provider import JSONProvider
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider that serializes with orjson and skips the str re-encode"""
+
+    # Keep Flask's sorted-key output; numpy values come straight from pandas-backed widgets
+    options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    @staticmethod
+    def default(obj):
+        """Fallback for types orjson does not handle natively"""
+        if isinstance(obj, Decimal):
+            return str(obj)
+        if hasattr(obj, '__html__'):
+            return str(obj.__html__())
+        raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+    def dumps(self, obj, **kwargs):
+        """Serialize obj to a JSON string"""
+        return orjson.dumps(obj, default=self.default, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        """Deserialize a JSON string or bytes"""
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Build a JSON response directly from orjson's bytes output"""
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self.options
+        if self._app.debug:
+            option |= orjson.OPT_INDENT_2
+
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=option),
+            mimetype='application/json'
+        )
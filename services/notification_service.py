@@ -36,7 +36,7 @@ class NotificationService:
         """
         try:
             if isinstance(user, int):
-                user = User.query.get(user)
+                user = db.session.get(User, user)
             
             notification = Notification.create(
                 user=user,
@@ -48,6 +48,7 @@ class NotificationService:
                 priority=priority,
                 expires_in_days=expires_in_days
             )
+            current_app.cache.clear_unread_notifications(user.id)
             
             # Send email if user has notifications enabled
             if user.email_notifications:
@@ -104,6 +105,53 @@ class NotificationService:
         except Exception as e:
             current_app.logger.error(f'Error notifying dashboard share: {str(e)}')
     
+    @staticmethod
+    def notify_admins_new_user_registration(user):
+        """Notify superusers and organization admins about a pending registration"""
+        try:
+            admins = User.query.filter(
+                User.is_active == True,
+                User.id != user.id,
+                db.or_(
+                    User.is_superuser == True,
+                    db.and_(
+                        User.organization_id == user.organization_id,
+                        User.role.has(code='org_admin')
+                    )
+                )
+            ).all()
+            
+            for admin in admins:
+                NotificationService.create_notification(
+                    user=admin,
+                    title='New User Awaiting Approval',
+                    message=f'{user.full_name} ({user.email}) registered and is awaiting approval',
+                    notification_type=NotificationType.INFO,
+                    action_url='/admin/users',
+                    action_label='Review Users',
+                    priority=4
+                )
+                
+        except Exception as e:
+            current_app.logger.error(f'Error notifying admins of registration: {str(e)}')
+    
+    @staticmethod
+    def send_account_activated_email(user):
+        """Notify a user that their account has been approved"""
+        try:
+            NotificationService.create_notification(
+                user=user,
+                title='Account Activated',
+                message='Your account has been approved. You can now log in.',
+                notification_type=NotificationType.SUCCESS,
+                action_url='/auth/login',
+                action_label='Log In',
+                priority=3
+            )
+            
+        except Exception as e:
+            current_app.logger.error(f'Error notifying account activation: {str(e)}')
+    
     @staticmethod
     def get_user_notifications(user, unread_only=False, limit=50):
         """Get user notifications"""
@@ -119,6 +167,26 @@ class NotificationService:
         
         return query.all()
     
+    @staticmethod
+    def get_unread_count(user_id):
+        """
+        Get a user's unread notification count, cached per user
+        
+        Args:
+            user_id: User ID
+            
+        Returns:
+            int: Number of unread notifications
+        """
+        return current_app.cache.get_or_set(
+            f'user:{user_id}:unread_notif',
+            lambda: Notification.query.filter_by(
+                user_id=user_id,
+                is_read=False
+            ).count(),
+            ttl=current_app.config.get('UNREAD_COUNT_TTL', 60)
+        )
+    
     @staticmethod
     def mark_all_read(user):
         """Mark all notifications as read for a user"""
@@ -129,6 +197,7 @@ class NotificationService:
             ).update({'is_read': True, 'read_at': datetime.utcnow()})
             
             db.session.commit()
+            current_app.cache.clear_unread_notifications(user.id)
             return True
             
         except Exception as e:
@@ -144,10 +213,16 @@ class NotificationService:
                 Notification.expires_at < datetime.utcnow()
             ).all()
             
+            user_ids = {notification.user_id for notification in expired}
+            
             for notification in expired:
                 db.session.delete(notification)
             
             db.session.commit()
+            
+            for user_id in user_ids:
+                current_app.cache.clear_unread_notifications(user_id)
+            
             return len(expired)
             
         except Exception as e:
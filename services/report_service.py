@@ -117,12 +117,18 @@ class ReportService:
             
             logs = query.order_by(DataRefreshLog.started_at.desc()).limit(1000).all()
             
-            # Calculate statistics
-            successful = len([l for l in logs if l.status == 'success'])
-            failed = len([l for l in logs if l.status == 'error'])
+            # Calculate statistics in a single pass over the logs
+            successful = failed = total_duration = total_records = 0
+            for log in logs:
+                if log.status == 'success':
+                    successful += 1
+                elif log.status == 'error':
+                    failed += 1
+                total_duration += log.duration_ms or 0
+                total_records += log.records_fetched or 0
             
-            avg_duration = sum([l.duration_ms for l in logs if l.duration_ms]) / len(logs) if logs else 0
-            avg_records = sum([l.records_fetched for l in logs if l.records_fetched]) / len(logs) if logs else 0
+            avg_duration = total_duration / len(logs) if logs else 0
+            avg_records = total_records / len(logs) if logs else 0
             
             report = {
                 'data_source': data_source.to_dict(),
@@ -1,3 +1,13 @@
+"""
+Widget Processor Service
+Transforms data source data into widget-ready format
+"""
+
+from flask import current_app
+import pandas as pd
+import json
+from .data_fetcher import DataFetcher
+
 
 class WidgetProcessor:
     """
@@ -18,8 +28,25 @@ class WidgetProcessor:
             dict: Processed widget data ready for rendering
         """
         try:
+            data_source = widget.data_source
+            
+            # Reuse the processed result while neither the widget config nor
+            # the source's cached data has changed since it was computed
+            use_cache = widget.cache_enabled and not filters
+            if use_cache and data_source.is_cache_valid:
+                cached = current_app.cache.get_widget_data(widget.id)
+                if (cached
+                        and cached.get('version') == widget.version
+                        and cached.get('source_cached_at') == data_source.cached_at.isoformat()):
+                    return {
+                        'success': True,
+                        'data': cached['data'],
+                        'from_cache': True,
+                        'cached_at': data_source.cached_at
+                    }
+            
             # Fetch data from source
-            fetch_result = DataFetcher.fetch_data(widget.data_source)
+            fetch_result = DataFetcher.fetch_data(data_source)
             
             if not fetch_result['success']:
                 return {
@@ -46,9 +73,15 @@ class WidgetProcessor:
             if widget.show_kpi and widget.kpi_config:
                 processed['kpi'] = WidgetProcessor._calculate_kpi(widget, raw_data)
             
+            if use_cache and data_source.cached_at:
+                current_app.cache.set_widget_data(widget.id, {
+                    'version': widget.version,
+                    'source_cached_at': data_source.cached_at.isoformat(),
+                    'data': processed
+                }, ttl=data_source.cache_ttl or 300)
+            
             return {
                 'success': True,
-                'widget': widget.to_dict(include_config=True),
                 'data': processed,
                 'from_cache': fetch_result.get('from_cache', False),
                 'cached_at': fetch_result.get('cached_at')
@@ -78,7 +111,11 @@ class WidgetProcessor:
             df = WidgetProcessor._apply_filters(df, filters)
         
         # Get field and aggregation
-        field = query_config.get('field', df.columns[0])
+        field = query_config.get('field')
+        if not field:
+            # Default to the first numeric column rather than a label column
+            numeric_cols = df.select_dtypes(include='number').columns
+            field = numeric_cols[0] if len(numeric_cols) else df.columns[0]
         agg_func = query_config.get('aggregation', 'sum')
         
         # Calculate value
@@ -210,23 +247,27 @@ class WidgetProcessor:
     @staticmethod
     def _apply_filters(df, filters):
         """Apply filters to DataFrame"""
+        # Combine every condition into one mask so the frame is copied once
+        mask = pd.Series(True, index=df.index)
+        
         for filter_config in filters:
             field = filter_config.get('field')
             operator = filter_config.get('operator', 'equals')
             value = filter_config.get('value')
             
             if operator == 'equals':
-                df = df[df[field] == value]
+                mask &= df[field] == value
             elif operator == 'not_equals':
-                df = df[df[field] != value]
+                mask &= df[field] != value
             elif operator == 'greater_than':
-                df = df[df[field] > value]
+                mask &= df[field] > value
             elif operator == 'less_than':
-                df = df[df[field] < value]
+                mask &= df[field] < value
             elif operator == 'contains':
-                df = df[df[field].str.contains(value, na=False)]
+                # Literal substring match; filter values are user text, not patterns
+                mask &= df[field].str.contains(str(value), regex=False, na=False)
         
-        return df
+        return df[mask]
     
     @staticmethod
     def _calculate_trend(df, field, agg_func):
@@ -0,0 +1,133 @@
+"""
+Celery Tasks for Batched Audit Log Writes
+"""
+
+from datetime import datetime
+import logging
+
+from tasks.data_refresh import celery, get_app
+
+logger = logging.getLogger(__name__)
+
+# Each flush run copies its in-flight batch to its own processing list
+# (registered in AUDIT_LOG_PROCESSING_RUNS) so a crash can't lose it
+AUDIT_LOG_PROCESSING = 'audit_log:processing'
+AUDIT_LOG_PROCESSING_RUNS = 'audit_log:processing_runs'
+AUDIT_LOG_DEAD_LETTER = 'audit_log:dead'
+AUDIT_LOG_FLUSH_LOCK = 'audit_log:flush_lock'
+AUDIT_LOG_FLUSH_LOCK_TTL = 120
+
+# A run's processing list is reclaimed once its heartbeat is this stale
+AUDIT_LOG_RUN_TTL = 600
+
+# Give up on an entry after this many failed inserts
+AUDIT_LOG_MAX_ATTEMPTS = 3
+
+
+def _audit_row(entry):
+    """Convert a queued entry into an audit_logs insert row"""
+    from models import AuditAction
+    
+    row = {key: value for key, value in entry.items() if key != 'attempts'}
+    row['action'] = AuditAction[entry['action']]
+    row['created_at'] = datetime.fromisoformat(entry['created_at'])
+    return row
+
+
+def _insert_entries(entries):
+    """
+    Insert queued entries in one batch, falling back to one row at a time
+    
+    Returns:
+        tuple: (number inserted, entries that could not be inserted)
+    """
+    from models import AuditLog, db
+    
+    try:
+        db.session.execute(db.insert(AuditLog), [_audit_row(entry) for entry in entries])
+        db.session.commit()
+        return len(entries), []
+    except Exception:
+        db.session.rollback()
+        logger.exception(f"Batch insert of {len(entries)} audit log entries failed; retrying one by one")
+    
+    inserted = 0
+    failed = []
+    
+    for entry in entries:
+        try:
+            db.session.execute(db.insert(AuditLog), [_audit_row(entry)])
+            db.session.commit()
+            inserted += 1
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Audit log entry failed to insert: {str(e)}")
+            failed.append(entry)
+    
+    return inserted, failed
+
+
+@celery.task(name='tasks.flush_audit_logs')
+def flush_audit_logs_task(batch_size=500):
+    """
+    Background task to insert queued audit log entries in multi-row batches
+    """
+    from models.support import AUDIT_LOG_QUEUE
+    
+    app = get_app()
+    
+    with app.app_context():
+        cache = app.cache
+        
+        # One flush at a time; the token keeps a run that outlived the
+        # lock from releasing its successor's
+        token = cache.acquire_lock(AUDIT_LOG_FLUSH_LOCK, AUDIT_LOG_FLUSH_LOCK_TTL)
+        if not token:
+            return {'success': True, 'flushed': 0, 'skipped': True}
+        
+        processing_key = f'{AUDIT_LOG_PROCESSING}:{token}'
+        total = 0
+        dead = 0
+        
+        try:
+            reclaimed = cache.requeue_abandoned(AUDIT_LOG_PROCESSING_RUNS, AUDIT_LOG_QUEUE)
+            if reclaimed:
+                logger.warning(f"Requeued {reclaimed} audit log entries from an interrupted flush")
+            
+            while True:
+                cache.touch_processing(AUDIT_LOG_PROCESSING_RUNS, processing_key, AUDIT_LOG_RUN_TTL)
+                entries = cache.dequeue_batch(AUDIT_LOG_QUEUE, batch_size, processing_key=processing_key)
+                if not entries:
+                    break
+                
+                inserted, failed = _insert_entries(entries)
+                total += inserted
+                
+                for entry in failed:
+                    entry['attempts'] = entry.get('attempts', 0) + 1
+                    if entry['attempts'] >= AUDIT_LOG_MAX_ATTEMPTS:
+                        cache.enqueue(AUDIT_LOG_DEAD_LETTER, entry)
+                        dead += 1
+                    else:
+                        cache.enqueue(AUDIT_LOG_QUEUE, entry)
+                
+                cache.delete(processing_key)
+                
+                # Leave retries for the next run rather than spinning on them now
+                if failed:
+                    break
+                
+                # Another worker took over after the lock expired
+                if not cache.extend_lock(AUDIT_LOG_FLUSH_LOCK, token, AUDIT_LOG_FLUSH_LOCK_TTL):
+                    logger.warning("Audit log flush lock lost; stopping this run")
+                    break
+        finally:
+            cache.release_processing(processing_key)
+            cache.release_lock(AUDIT_LOG_FLUSH_LOCK, token)
+        
+        if total:
+            logger.info(f"Flushed {total} audit log entries")
+        if dead:
+            logger.error(f"Moved {dead} audit log entries to {AUDIT_LOG_DEAD_LETTER} after {AUDIT_LOG_MAX_ATTEMPTS} attempts")
+        
+        return {'success': True, 'flushed': total, 'dead_lettered': dead}
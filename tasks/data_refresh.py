@@ -8,6 +8,7 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+
 # Initialize Celery immediately with default config
 celery = Celery('transport_dashboard')
 celery.conf.update(
@@ -18,6 +19,20 @@ celery.conf.update(
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
+    include=['tasks.audit', 'tasks.twofa', 'tasks.mail'],
+    # CPU-bound QR rendering and slow mail delivery run on their own worker pools.
+    # Workers must consume them too, e.g.: celery -A tasks.data_refresh worker -Q celery,twofa,mail
+    task_routes={
+        'tasks.render_totp_qr': {'queue': 'twofa'},
+        'tasks.mail.*': {'queue': 'mail'},
+    },
+    beat_schedule={
+        # Drain the deferred audit queue every few seconds
+        'flush-audit-logs': {
+            'task': 'tasks.flush_audit_logs',
+            'schedule': 5.0,
+        },
+    },
 )
 
 def init_celery(app):
@@ -33,20 +48,31 @@ def init_celery(app):
     return celery
 
 
+_app = None
+
+
+def get_app():
+    """Create the Flask app once per worker process and reuse it for every task"""
+    global _app
+    if _app is None:
+        from app import create_app
+        _app = create_app()
+    return _app
+
+
 @celery.task(bind=True, name='tasks.refresh_data_source')
 def refresh_data_source_task(self, data_source_id):
     """
     Background task to refresh a data source
     """
-    from app import create_app
     from models import DataSource, db
     from services import DataFetcher
     
-    app = create_app()
+    app = get_app()
     
     with app.app_context():
         try:
-            data_source = DataSource.query.get(data_source_id)
+            data_source = db.session.get(DataSource, data_source_id)
             
             if not data_source:
                 logger.error(f"Data source {data_source_id} not found")
@@ -102,10 +128,9 @@ def refresh_all_data_sources_task():
     """
     Background task to refresh all active data sources with auto-refresh enabled
     """
-    from app import create_app
     from models import DataSource
     
-    app = create_app()
+    app = get_app()
     
     with app.app_context():
         try:
@@ -0,0 +1,51 @@
+"""
+Celery Tasks for User Notification Mail
+"""
+
+import logging
+
+from tasks.data_refresh import celery, get_app
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task(name='tasks.mail.notify_admins_new_user')
+def notify_admins_new_user_task(user_id):
+    """
+    Background task to notify admins about a pending registration
+    """
+    from models import User, db
+    from services import NotificationService
+    
+    app = get_app()
+    
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        
+        if not user:
+            logger.error(f"User {user_id} not found")
+            return {'success': False, 'error': 'User not found'}
+        
+        NotificationService.notify_admins_new_user_registration(user)
+        return {'success': True}
+
+
+@celery.task(name='tasks.mail.send_account_activated_email')
+def send_account_activated_email_task(user_id):
+    """
+    Background task to tell a user their account was approved
+    """
+    from models import User, db
+    from services import NotificationService
+    
+    app = get_app()
+    
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        
+        if not user:
+            logger.error(f"User {user_id} not found")
+            return {'success': False, 'error': 'User not found'}
+        
+        NotificationService.send_account_activated_email(user)
+        return {'success': True}
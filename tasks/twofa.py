@@ -0,0 +1,39 @@
+"""
+Celery Tasks for 2FA QR Code Rendering
+"""
+
+import logging
+
+from tasks.data_refresh import celery, get_app
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task(name='tasks.render_totp_qr')
+def render_totp_qr_task(user_id, secret_digest):
+    """
+    Background task to render a 2FA QR code into the cache
+    """
+    from models import User, db
+    from services import AuthService
+    
+    app = get_app()
+    
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        
+        # The secret stays out of the message; skip renders for a replaced secret
+        if not user or not user.two_fa_secret or \
+                AuthService.totp_secret_digest(user.two_fa_secret) != secret_digest:
+            logger.info(f"Skipping stale 2FA QR render for user {user_id}")
+            return {'success': False, 'error': 'Secret changed'}
+        
+        qr_code = AuthService.render_totp_qr(user.get_2fa_uri())
+        app.cache.set(
+            AuthService.totp_qr_cache_key(user_id, secret_digest),
+            qr_code,
+            ttl=app.config['TWOFA_QR_TTL']
+        )
+        
+        logger.info(f"Rendered 2FA QR code for user {user_id}")
+        return {'success': True}
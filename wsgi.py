@@ -0,0 +1,10 @@
+"""
+WSGI entry point for production servers
+
+Usage: gunicorn -c gunicorn.conf.py wsgi:app
+   or: gunicorn -w $(nproc) -k gthread --threads 4 -b 0.0.0.0:5000 wsgi:application
+"""
+
+from app import create_app
+
+app = application = create_app()